@@ -11,3 +11,43 @@ register(MovieFactory)
 @pytest.fixture(scope="session")
 def client():
     return Client()
+
+
+@pytest.fixture(autouse=True)
+def no_read_replica_routing(settings):
+    """
+    Readonly alias is a test mirror of default, but it is a separate connection,
+    which wouldn't see data created inside of a test transaction.
+    """
+    settings.DATABASE_ROUTERS = []
+
+
+@pytest.fixture(autouse=True)
+def no_debug_toolbar(settings):
+    """
+    Toolbar's SQL panel patches cursors of every connection, including readonly one,
+    which is guarded by django test case as not used in tests.
+    """
+    settings.DEBUG_TOOLBAR_CONFIG = {"SHOW_TOOLBAR_CALLBACK": lambda request: False}
+
+
+@pytest.fixture(autouse=True)
+def no_snapshot(settings, tmp_path):
+    """
+    Views are served by the ORM, unless a test builds and enables a snapshot itself.
+    Commands under test build their snapshots aside of the one of the dev DB.
+    """
+    settings.SNAPSHOT_ENABLED = False
+    settings.SNAPSHOT_PATH = tmp_path / "snapshot.bin"
+
+
+@pytest.fixture(autouse=True)
+def isolated_dataset_version(settings, tmp_path):
+    """
+    Dataset version marker is touched by commands under test, never the one of the dev DB.
+    Slug caches are dropped, so they never serve instances of a previous test.
+    """
+    from searcher import slug_cache
+
+    settings.DATASET_VERSION_PATH = tmp_path / "dataset.version"
+    slug_cache.reset()
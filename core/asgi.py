@@ -0,0 +1,18 @@
+"""
+ASGI config for searcher project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Search and detail pages are served by async views in this mode, see searcher.async_views.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+os.environ.setdefault("ASYNC_VIEWS", "1")
+
+application = get_asgi_application()
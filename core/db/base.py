@@ -0,0 +1,53 @@
+"""
+SQLite backend tuned for serving reads while the parser writes.
+Plugs into Django as ENGINE = "core.db" and applies the PRAGMAs from
+OPTIONS["pragmas"] every time a new connection is opened.
+Registers SQL functions of core.db.functions as well.
+"""
+import sqlite3
+from typing import Any
+
+from django.db.backends.sqlite3 import base
+
+from .functions import UNICODE_LOWER_FUNCTION, unicode_lower
+
+PRAGMAS_OPTION = "pragmas"
+
+# PRAGMAs, which only make sense (or are only permitted) on a writable connection.
+WRITE_ONLY_PRAGMAS = frozenset({"journal_mode", "synchronous"})
+
+
+def apply_pragmas(conn: sqlite3.Connection, pragmas: dict[str, Any], read_only: bool) -> None:
+    """
+    Executes provided PRAGMAs on an opened sqlite connection.
+    @param conn: sqlite3.Connection, freshly opened connection.
+    @param pragmas: dict, PRAGMA name to its value.
+    @param read_only: bool, whether connection was opened with mode=ro,
+        PRAGMAs changing the database file are skipped in that case.
+    """
+    for name, value in pragmas.items():
+        if read_only and name in WRITE_ONLY_PRAGMAS:
+            continue
+        conn.execute(f"PRAGMA {name} = {value}")
+
+
+def is_read_only_uri(database: str) -> bool:
+    return database.startswith("file:") and "mode=ro" in database
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self) -> dict[str, Any]:
+        kwargs = super().get_connection_params()
+        # Not an sqlite3.connect() argument, consumed in get_new_connection.
+        kwargs.pop(PRAGMAS_OPTION, None)
+        return kwargs
+
+    def get_new_connection(self, conn_params: dict[str, Any]) -> sqlite3.Connection:
+        conn = super().get_new_connection(conn_params)
+        apply_pragmas(
+            conn,
+            self.settings_dict["OPTIONS"].get(PRAGMAS_OPTION, {}),
+            read_only=is_read_only_uri(conn_params["database"]),
+        )
+        conn.create_function(UNICODE_LOWER_FUNCTION, 1, unicode_lower, deterministic=True)
+        return conn
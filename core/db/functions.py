@@ -0,0 +1,22 @@
+"""
+SQL functions, which the sqlite backend registers on every connection.
+"""
+
+from django.db.models import CharField, Transform
+
+# SQLite LOWER() and LIKE fold ASCII letters only, "Š" stays "Š".
+UNICODE_LOWER_FUNCTION = "UNICODE_LOWER"
+
+
+def unicode_lower(value):
+    return value.lower() if isinstance(value, str) else value
+
+
+@CharField.register_lookup
+class UnicodeLower(Transform):
+    """
+    Lowercases a text column like python str.lower does, e.g. name__unicode_lower__contains.
+    """
+
+    function = UNICODE_LOWER_FUNCTION
+    lookup_name = "unicode_lower"
@@ -0,0 +1,27 @@
+from typing import Any, Optional
+
+from django.db.models import Model
+
+WRITE_DB_ALIAS = "default"
+READ_DB_ALIAS = "readonly"
+
+
+class ReadOnlyReplicaRouter:
+    """
+    Sends all reads to a read-only (mode=ro) connection of the same sqlite file,
+    so the web tier never competes for the write lock with the parser.
+    Writes and migrations always go to the default connection.
+    """
+
+    def db_for_read(self, model: type[Model], **hints: Any) -> str:
+        return READ_DB_ALIAS
+
+    def db_for_write(self, model: type[Model], **hints: Any) -> str:
+        return WRITE_DB_ALIAS
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: Any) -> bool:
+        # Both aliases point to the same database file.
+        return True
+
+    def allow_migrate(self, db: str, app_label: str, **hints: Any) -> Optional[bool]:
+        return db == WRITE_DB_ALIAS
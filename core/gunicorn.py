@@ -0,0 +1,31 @@
+"""
+Gunicorn config, which warms the app up before workers are forked:
+gunicorn -c python:core.gunicorn core.wsgi:application
+
+Workers share everything loaded by the master, see searcher.warmup.
+parse_csfd sends SIGHUP to the master after it rewrites the dataset,
+the master warms up again and replaces workers by new ones.
+"""
+
+import os
+
+from django.conf import settings
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+preload_app = True
+pidfile = str(settings.GUNICORN_PIDFILE)
+worker_class = "gthread"
+threads = 8
+
+
+def when_ready(server):
+    from searcher import warmup
+
+    warmup.warm_up()
+
+
+def on_reload(server):
+    from searcher import warmup
+
+    warmup.warm_up()
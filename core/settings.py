@@ -12,10 +12,20 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = "django-insecure-on-purpose"
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# DJANGO_DEBUG=0 is the production profile: no debug toolbar, no SQL queries kept or logged.
+DEBUG = os.getenv("DJANGO_DEBUG", "1") == "1"
+
+# Set by core.asgi, search and detail pages are served by searcher.async_views then.
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "0") == "1"
+
+# Debug toolbar middleware is sync only and would pin every request to a thread in ASGI mode.
+DEBUG_TOOLBAR = DEBUG and not ASYNC_VIEWS
 
 ALLOWED_HOSTS = ["127.0.0.1", "0.0.0.0", "localhost"]
 
+# Hosts allowed to see internal pages, such as latency histograms.
+INTERNAL_IPS = ["127.0.0.1"]
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -28,12 +38,11 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     # Project
     "searcher.apps.SearcherConfig",
-    # 3rd party
-    "debug_toolbar",
 ]
 
 MIDDLEWARE = [
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "searcher.instrumentation.PerformanceMiddleware",
+    "searcher.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -43,6 +52,13 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("searcher.profiling.ProfilingMiddleware") + 1,
+        "debug_toolbar.middleware.DebugToolbarMiddleware",
+    )
+
 ROOT_URLCONF = "core.urls"
 
 TEMPLATES = [
@@ -62,18 +78,47 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "core.wsgi.application"
+ASGI_APPLICATION = "core.asgi.application"
 
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+DATABASE_PATH = Path(os.getenv("DATABASE_PATH", str(BASE_DIR / "versioned_db.sqlite3")))
+
+# Connections are kept open per worker thread instead of reconnecting on every request.
+DATABASE_CONN_MAX_AGE = int(os.getenv("DATABASE_CONN_MAX_AGE", "600"))
+
+# WAL lets readers proceed while the parser holds the write lock,
+# the rest trades some durability on power loss for far fewer fsyncs and disk reads.
+DATABASE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,  # negative value is in KiB, i.e. 64MB
+    "mmap_size": 268435456,  # 256MB
+    "temp_store": "MEMORY",
+}
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "versioned_db.sqlite3",
-    }
+        "ENGINE": "core.db",
+        "NAME": DATABASE_PATH,
+        "CONN_MAX_AGE": DATABASE_CONN_MAX_AGE,
+        "OPTIONS": {"pragmas": DATABASE_PRAGMAS},
+    },
+    # Same file opened with mode=ro, used for all reads, see core.db.routers.
+    # Path is percent-encoded, "?" or "#" in it would be taken for the query or the fragment.
+    "readonly": {
+        "ENGINE": "core.db",
+        "NAME": f"{DATABASE_PATH.resolve().as_uri()}?mode=ro",
+        "CONN_MAX_AGE": DATABASE_CONN_MAX_AGE,
+        "OPTIONS": {"pragmas": {**DATABASE_PRAGMAS, "query_only": "ON"}},
+        "TEST": {"MIRROR": "default"},
+    },
 }
 
+DATABASE_ROUTERS = ["core.db.routers.ReadOnlyReplicaRouter"]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -137,18 +182,69 @@ LOGGING = {
             "propagate": False,
         },
         "django.db.backends": {
-            "level": "DEBUG",
+            "level": "DEBUG" if DEBUG else "WARNING",
         },
         "parser": {
             "level": "DEBUG",
         },
+        "searcher.performance": {
+            "level": "WARNING",
+        },
+        "searcher.profiling": {
+            "level": "INFO",
+        },
+        "searcher.warmup": {
+            "level": "INFO",
+        },
     },
 }
 
 DEBUG_TOOLBAR_CONFIG = {
-    "SHOW_TOOLBAR_CALLBACK": lambda request: True,
+    "SHOW_TOOLBAR_CALLBACK": lambda request: DEBUG,
 }
 
+# Max count of movies and (separately) actors listed on the search page.
+SEARCH_RESULTS_LIMIT = int(os.getenv("SEARCH_RESULTS_LIMIT", "100"))
+
+# Read-only snapshot of the dataset, which is built by parse_csfd (or build_snapshot command)
+# and served instead of the ORM, when exists, see searcher.snapshot.
+SNAPSHOT_ENABLED = os.getenv("SNAPSHOT_ENABLED", "1") == "1"
+SNAPSHOT_PATH = Path(os.getenv("SNAPSHOT_PATH", str(BASE_DIR / "snapshot.bin")))
+# How often (in seconds) workers check, whether the snapshot file was rebuilt.
+SNAPSHOT_CHECK_INTERVAL = float(os.getenv("SNAPSHOT_CHECK_INTERVAL", "1"))
+
+# Touched after the dataset is rewritten, so every process drops its in-memory structures
+# (see searcher.warmup.dataset_version), checked at most once per interval (in seconds).
+DATASET_VERSION_PATH = Path(os.getenv("DATASET_VERSION_PATH", str(BASE_DIR / "dataset.version")))
+DATASET_VERSION_CHECK_INTERVAL = float(os.getenv("DATASET_VERSION_CHECK_INTERVAL", "1"))
+
+# Detail pages of that many most recently requested movies and actors (each) are cached
+# in every worker, unknown slugs are filtered out by a Bloom filter with that false positive rate,
+# see searcher.slug_cache. A movie with its cast takes about 8KB of private memory of a worker.
+SLUG_CACHE_SIZE = int(os.getenv("SLUG_CACHE_SIZE", "1000"))
+SLUG_FILTER_ERROR_RATE = float(os.getenv("SLUG_FILTER_ERROR_RATE", "0.01"))
+
+# Gunicorn master (run with core/gunicorn.py config) writes its pid there,
+# parse_csfd sends it SIGHUP to warm up again with the new dataset, see searcher.warmup.
+GUNICORN_PIDFILE = Path(os.getenv("GUNICORN_PIDFILE", str(BASE_DIR / "gunicorn.pid")))
+
+# Requests slower than that are logged, but only a sampled fraction of them
+PERFORMANCE_SLOW_REQUEST_MS = float(os.getenv("PERFORMANCE_SLOW_REQUEST_MS", "500"))
+PERFORMANCE_SLOW_REQUEST_SAMPLE_RATE = float(
+    os.getenv("PERFORMANCE_SLOW_REQUEST_SAMPLE_RATE", "0.1")
+)
+# Latency histograms (/__metrics__/) are served to INTERNAL_IPS with X-Metrics-Token: <token>
+# header. Behind a local reverse proxy every client comes from 127.0.0.1,
+# so without a token they are only served with DEBUG.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# On-demand profiling of a single request with ?__profile=<token> or X-Profile: <token> header,
+# see searcher.profiling. Middleware is not even loaded, when disabled.
+# The token is required, by default profiling is on with DEBUG, if the token is set.
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", str(int(DEBUG and bool(PROFILING_TOKEN)))) == "1"
+PROFILING_DIR = Path(os.getenv("PROFILING_DIR", str(BASE_DIR / "profiles")))
+
 # Configuration for a command to parse the list of movies
 PARSER_BASE_URL = "https://www.csfd.cz"
 PARSER_USER_AGENT = "PostmanRuntime/7.26.8"
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SearcherConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "searcher"
+
+    def ready(self):
+        # Connects receivers of dataset changes and warm-up.
+        from . import slug_cache  # noqa: F401
@@ -0,0 +1,123 @@
+"""
+Async versions of search and detail views, served when the app runs through ASGI (core.asgi).
+ORM of this django version is sync only, so DB queries and rendering run in the thread,
+where django runs all sync code (thread_sensitive), while the event loop only awaits them
+and is free to serve other (slow) clients meanwhile. DB connections of that thread are closed
+by request_started/request_finished signals, which run there as well.
+"""
+
+from typing import Any, Callable, Iterable, Optional
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpRequest, HttpResponse, HttpResponseNotAllowed
+from django.shortcuts import redirect
+from django.template.loader import render_to_string
+
+from . import forms, instrumentation, services, snapshot
+
+
+async def run_sync(func: Callable, *args: Any) -> Any:
+    """
+    Runs func in the sync thread. Its SQL and template timings are collected separately
+    and added to timings of the request back on the event loop.
+    """
+    call_timings = instrumentation.RequestTimings()
+
+    def call() -> Any:
+        token = instrumentation.current_timings.set(call_timings)
+        try:
+            return func(*args)
+        finally:
+            instrumentation.current_timings.reset(token)
+
+    try:
+        return await sync_to_async(call, thread_sensitive=True)()
+    finally:
+        timings = instrumentation.current_timings.get()
+        if timings is not None:
+            timings.add(call_timings)
+
+
+async def render_async(request: HttpRequest, template_name: str, context: dict) -> HttpResponse:
+    """
+    Renders a template in the sync thread, lazy querysets in templates are evaluated there too.
+    """
+
+    def render() -> str:
+        with instrumentation.template_timer():
+            return render_to_string(template_name, context, request)
+
+    return HttpResponse(await run_sync(render))
+
+
+async def search_movies_and_actors(query: Optional[str]) -> tuple[Iterable, Iterable]:
+    """
+    Movies and actors come from a single statement, which runs in the sync thread.
+    """
+    if snapshot.get_snapshot() is not None or not query:
+        # Served from memory, nothing to wait for.
+        return services.search_movies_and_actors(query)
+    return await run_sync(services.get_movies_and_actors_by_query, query)
+
+
+async def search(request: HttpRequest) -> HttpResponse:
+    """
+    Async version of views.SearchView.
+    """
+    if request.method == "POST":
+        form = forms.SearchForm(request.POST)
+        if form.is_valid():
+            return redirect("/?" + urlencode({"q": form.data["search_input"]}))
+        return await render_async(request, "search.html", {"form": form})
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET", "POST"])
+
+    query = request.GET.get("q")
+    movies, actors = await search_movies_and_actors(query)
+    return await render_async(
+        request,
+        "search.html",
+        {
+            "form": forms.SearchForm(),
+            "query": query,
+            "movies": movies,
+            "actors": actors,
+        },
+    )
+
+
+async def detail(
+    request: HttpRequest,
+    slug: str,
+    snapshot_table: str,
+    get_by_slug: Callable[[str], Any],
+    template_name: str,
+    context_object_name: str,
+) -> HttpResponse:
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    dataset = snapshot.get_snapshot()
+    if dataset is None:
+        instance = await run_sync(get_by_slug, slug)
+    else:
+        instance = dataset.get_by_slug(getattr(dataset, snapshot_table), slug)
+        if instance is None:
+            raise Http404(f"No {context_object_name} matches the given slug.")
+    return await render_async(
+        request, template_name, {"object": instance, context_object_name: instance}
+    )
+
+
+async def actor(request: HttpRequest, slug: str) -> HttpResponse:
+    """
+    Async version of views.ActorView.
+    """
+    return await detail(request, slug, "actors", services.get_actor_by_slug, "actor.html", "actor")
+
+
+async def movie(request: HttpRequest, slug: str) -> HttpResponse:
+    """
+    Async version of views.MovieView.
+    """
+    return await detail(request, slug, "movies", services.get_movie_by_slug, "movie.html", "movie")
@@ -0,0 +1,237 @@
+"""
+Helpers shared by benchmark management commands and tests, which check what they measure.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.template import engines
+from django.template.backends.django import Template
+
+from searcher import forms
+
+BASELINE_PATH = settings.BASE_DIR / "benchmarks" / "baseline.json"
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Nearest-rank percentile.
+    @param values: list of measured values, does not have to be sorted.
+    @param q: float, percentile in 0..1 range.
+    """
+    if not values:
+        return 0.0
+    return sorted(values)[min(len(values) - 1, int(len(values) * q))]
+
+
+def summarize(latencies: list[float], elapsed: float) -> dict[str, Any]:
+    """
+    @param latencies: list of latencies in seconds.
+    @param elapsed: float, wall time in seconds, during which latencies were measured.
+    @return: dict with latency percentiles in milliseconds and throughput per second.
+    """
+    return {
+        "n": len(latencies),
+        "mean_ms": statistics.mean(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies, default=0.0) * 1000,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+    }
+
+
+def load_results(path: Path) -> Optional[dict[str, Any]]:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def save_results(path: Path, results: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+
+
+def compare_results(
+    results: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    threshold: float,
+) -> tuple[list[str], list[str]]:
+    """
+    Compares p50/p99 latencies of every benchmark against a baseline.
+    @param threshold: float, allowed relative slowdown, e.g. 0.1 for 10%.
+    @return: tuple, first item is report lines, second - names of regressed benchmarks.
+    """
+    report, regressions = [], []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            report.append(f"{name}: no baseline")
+            continue
+        changes = []
+        regressed = False
+        for metric in ("p50_ms", "p99_ms"):
+            change = current[metric] / previous[metric] - 1 if previous[metric] else 0.0
+            changes.append(
+                f"{metric} {previous[metric]:.2f} -> {current[metric]:.2f} ({change:+.0%})"
+            )
+            regressed = regressed or change > threshold
+        if regressed:
+            regressions.append(name)
+        report.append(f"{name}: {', '.join(changes)}{' REGRESSION' if regressed else ''}")
+    return report, regressions
+
+
+# Modules, which should not be loaded until they are actually used.
+HEAVY_MODULES = ("bs4", "lxml", "requests", "tenacity", "debug_toolbar", "faker")
+
+# Both probes run in a fresh interpreter and print a json with their measurements.
+PROBE_COMMON = f"""
+import gc, json, os, sys, time
+start = time.perf_counter()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+
+def loaded_heavy_modules():
+    return [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+
+def finish(imported, heavy_modules, first, **extra):
+    gc.collect()
+    with open("/proc/self/status") as f:
+        rss = next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+    print(json.dumps({{
+        "import_ms": (imported - start) * 1000,
+        "first_ms": (first - imported) * 1000,
+        "rss_kb": rss,
+        "heavy_modules": heavy_modules,
+        **extra,
+    }}))
+"""
+
+# Loads the WSGI application as a worker does and serves the first request.
+WEB_PROBE = (
+    PROBE_COMMON
+    + """
+from wsgiref.util import setup_testing_defaults
+from core.wsgi import application
+imported = time.perf_counter()
+heavy_modules = loaded_heavy_modules()
+environ = {"PATH_INFO": sys.argv[1], "QUERY_STRING": sys.argv[2]}
+setup_testing_defaults(environ)
+statuses = []
+response = application(environ, lambda status, headers: statuses.append(status))
+b"".join(response)
+response.close()
+finish(imported, heavy_modules, time.perf_counter(), status=statuses[0])
+"""
+)
+
+# Loads parse_csfd as manage.py does and parses a movie page, as the first unit of its work.
+PARSER_PROBE = (
+    PROBE_COMMON
+    + """
+import django
+django.setup()
+from django.core.management import load_command_class
+command = load_command_class("searcher", "parse_csfd")
+command.create_parser("manage.py", "parse_csfd").format_help()
+imported = time.perf_counter()
+heavy_modules = loaded_heavy_modules()
+sys.modules[type(command).__module__].parse_movie_with_actors_from_html(
+    '<div class="film-header-name"><h1>Movie</h1></div>'
+    '<div><h4>Hrají: </h4><span><a href="/tvurce/1-actor/">Actor</a></span></div>'
+)
+finish(imported, heavy_modules, time.perf_counter())
+"""
+)
+
+PROBES = {"web": WEB_PROBE, "parse_csfd": PARSER_PROBE}
+PROFILES = {"development": "1", "production": "0"}
+
+
+def run_probe(target: str, profile: str, path: str = "/", query: str = "") -> dict[str, Any]:
+    """
+    @param target: "web" or "parse_csfd".
+    @param profile: "development" or "production" settings profile (DJANGO_DEBUG).
+    @return: import time (from interpreter start to ready), time of the first request
+        (parsed page for parse_csfd), RSS after it and heavy modules loaded on import.
+    """
+    env = {**os.environ, "DJANGO_DEBUG": PROFILES[profile]}
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", PROBES[target], path, query],
+        cwd=settings.BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    result = json.loads(output.splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+
+# Templates, as they were before the detail_links tag: {% url %} for every row.
+REFERENCE_TEMPLATES_DIR = settings.BASE_DIR / "benchmarks" / "reference_templates"
+TEMPLATE_NAMES = ("search.html", "actor.html", "movie.html")
+
+
+def get_reference_template(template_name: str) -> Template:
+    return engines["django"].from_string((REFERENCE_TEMPLATES_DIR / template_name).read_text())
+
+
+def make_rows(count: int, kind: str) -> list[SimpleNamespace]:
+    # Names need escaping, as real ones sometimes do.
+    return [
+        SimpleNamespace(name=f"{kind} <{number}> & Co.", slug=f"{number}-{kind}-{number}-co")
+        for number in range(count)
+    ]
+
+
+def make_context(template_name: str, rows: int) -> dict:
+    """
+    Context of the template with rows links, entities quack like model instances.
+    """
+    movies, actors = make_rows(rows, "Movie"), make_rows(rows, "Actor")
+    if template_name == "search.html":
+        return {"form": forms.SearchForm(), "query": "co", "movies": movies, "actors": actors}
+    if template_name == "actor.html":
+        actor = SimpleNamespace(name="Actor", movies=SimpleNamespace(all=lambda: movies))
+        return {"object": actor, "actor": actor}
+    movie = SimpleNamespace(name="Movie", actors=SimpleNamespace(all=lambda: actors))
+    return {"object": movie, "movie": movie}
+
+
+def measure(render: Callable[[], str], min_time: float) -> float:
+    """
+    @return: best time of a single render in seconds.
+    """
+    best = float("inf")
+    deadline = time.perf_counter() + min_time
+    repeats = 0
+    while repeats < 3 or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        render()
+        best = min(best, time.perf_counter() - start)
+        repeats += 1
+    return best
+
+
+SMAPS_ROLLUP = Path("/proc/self/smaps_rollup")
+MEMORY_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def read_memory() -> dict[str, int]:
+    memory = dict.fromkeys(MEMORY_FIELDS, 0)
+    if SMAPS_ROLLUP.exists():
+        for line in SMAPS_ROLLUP.read_text().splitlines():
+            field, _, value = line.partition(":")
+            if field in memory:
+                memory[field] = int(value.split()[0])
+    return memory
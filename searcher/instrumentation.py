@@ -0,0 +1,283 @@
+"""
+Lightweight per-request performance instrumentation.
+Counts SQL queries and their time, template render time and total time of a view,
+exposes them in a Server-Timing header and aggregates them into in-process histograms.
+"""
+import asyncio
+import bisect
+import hmac
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest, HttpResponse
+
+logger = logging.getLogger("searcher.performance")
+
+# Upper bounds of histogram buckets in milliseconds, the last bucket catches everything else.
+BUCKET_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+UNRESOLVED_VIEW = "unresolved"
+
+METRICS_TOKEN_HEADER = "HTTP_X_METRICS_TOKEN"
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket histogram, cheap enough to be updated on every request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def record(self, duration_ms: float) -> None:
+        index = bisect.bisect_left(BUCKET_BOUNDS_MS, duration_ms)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum_ms += duration_ms
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        @return: upper bound of the bucket, where q-th percentile lies,
+            the last bound if it lies in the last unbounded bucket (so it is a lower estimate,
+            which stays valid JSON unlike inf), None if nothing was recorded.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return BUCKET_BOUNDS_MS[-1]
+
+    def as_dict(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "count": self.count,
+                "mean_ms": self.sum_ms / self.count if self.count else None,
+                "p50_ms": self.percentile(0.5),
+                "p99_ms": self.percentile(0.99),
+                "buckets": {
+                    **{f"le_{bound}": count for bound, count in zip(BUCKET_BOUNDS_MS, self.counts)},
+                    "le_inf": self.counts[-1],
+                },
+            }
+
+
+class HistogramRegistry:
+    """
+    Histograms by view name and measured metric (total, db, template).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: dict[tuple[str, str], LatencyHistogram] = {}
+
+    def record(self, view_name: str, metric: str, duration_ms: float) -> None:
+        key = (view_name, metric)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram())
+        histogram.record(duration_ms)
+
+    def dump(self) -> dict[str, dict[str, Any]]:
+        # Copied under the lock, record of a new view would change the dict during iteration.
+        with self._lock:
+            items = sorted(self._histograms.items())
+        result: dict[str, dict[str, Any]] = {}
+        for (view_name, metric), histogram in items:
+            result.setdefault(view_name, {})[metric] = histogram.as_dict()
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+histograms = HistogramRegistry()
+
+
+class RequestTimings:
+    """
+    Timings collected during a single request.
+    """
+
+    __slots__ = ("sql_count", "sql_ms", "template_ms", "template_start")
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.template_start = 0.0
+
+    def add(self, other: "RequestTimings") -> None:
+        self.sql_count += other.sql_count
+        self.sql_ms += other.sql_ms
+        self.template_ms += other.template_ms
+
+
+# Timings of a request being processed. Context variables are copied into the thread,
+# which async views use for DB queries and rendering, they collect timings of every call there
+# separately and add them back on the event loop (see async_views.run_sync).
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("current_timings", default=None)
+
+
+def record_sql(execute: Callable, sql: str, params: Any, many: bool, context: dict):
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.sql_ms += (time.perf_counter() - start) * 1000
+        timings.sql_count += 1
+
+
+def install_sql_wrapper(connection: BaseDatabaseWrapper, **kwargs) -> None:
+    if record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_sql)
+
+
+@contextmanager
+def template_timer() -> Iterator[None]:
+    """
+    Adds time spent inside to template render time of the current request.
+    """
+    timings = current_timings.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.template_ms += (time.perf_counter() - start) * 1000
+
+
+def is_metrics_allowed(request: HttpRequest) -> bool:
+    """
+    Metrics are served only to INTERNAL_IPS with X-Metrics-Token header matching METRICS_TOKEN,
+    without the token (e.g. during local development) only with DEBUG.
+    """
+    if request.META.get("REMOTE_ADDR") not in settings.INTERNAL_IPS:
+        return False
+    token = settings.METRICS_TOKEN
+    if not token:
+        return settings.DEBUG
+    return hmac.compare_digest(request.META.get(METRICS_TOKEN_HEADER, ""), token)
+
+
+def get_view_name(request: HttpRequest) -> str:
+    if request.resolver_match is None:
+        return UNRESOLVED_VIEW
+    view_func = request.resolver_match.func
+    view_class = getattr(view_func, "view_class", None)
+    return (view_class or view_func).__name__
+
+
+class PerformanceMiddleware:
+    """
+    Measures every request and adds a Server-Timing header to the response.
+    Slow requests are logged, but only a sample of them, to keep logging cheap under load.
+    Works both in sync (WSGI) and async (ASGI) mode.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Tells django handler, that this middleware instance is a coroutine function.
+            self._is_coroutine = asyncio.coroutines._is_coroutine  # type: ignore
+        # Connections are thread local and opened lazily, so the wrapper is installed
+        # to connections of the current thread and to every newly opened one.
+        for connection in connections.all():
+            install_sql_wrapper(connection)
+        connection_created.connect(install_sql_wrapper, dispatch_uid="install_sql_wrapper")
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.is_async:
+            return self.__acall__(request)  # type: ignore
+        start = time.perf_counter()
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings, start)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        start = time.perf_counter()
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            response = await self.get_response(request)  # type: ignore
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings, start)
+
+    def finish(
+        self, request: HttpRequest, response: HttpResponse, timings: RequestTimings, start: float
+    ) -> HttpResponse:
+        total_ms = (time.perf_counter() - start) * 1000
+        view_name = get_view_name(request)
+        response["Server-Timing"] = (
+            f'db;desc="{timings.sql_count} queries";dur={timings.sql_ms:.2f}, '
+            f"tpl;dur={timings.template_ms:.2f}, total;dur={total_ms:.2f}"
+        )
+        histograms.record(view_name, "total", total_ms)
+        histograms.record(view_name, "db", timings.sql_ms)
+        histograms.record(view_name, "template", timings.template_ms)
+        self.log_slow_request(request, view_name, timings, total_ms)
+        return response
+
+    def process_template_response(self, request: HttpRequest, response: Any) -> Any:
+        # Called right before the response is rendered, post-render callbacks run right after.
+        timings = current_timings.get()
+        if timings is None:
+            return response
+        timings.template_start = time.perf_counter()
+        response.add_post_render_callback(
+            lambda _: setattr(
+                timings,
+                "template_ms",
+                (time.perf_counter() - timings.template_start) * 1000,
+            )
+        )
+        return response
+
+    @staticmethod
+    def log_slow_request(
+        request: HttpRequest, view_name: str, timings: RequestTimings, total_ms: float
+    ) -> None:
+        if total_ms < settings.PERFORMANCE_SLOW_REQUEST_MS:
+            return
+        if random.random() >= settings.PERFORMANCE_SLOW_REQUEST_SAMPLE_RATE:
+            return
+        logger.warning(
+            "Slow request %s %s (%s): total=%.2fms db=%.2fms/%d queries template=%.2fms",
+            request.method,
+            request.get_full_path(),
+            view_name,
+            total_ms,
+            timings.sql_ms,
+            timings.sql_count,
+            timings.template_ms,
+        )
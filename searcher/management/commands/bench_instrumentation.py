@@ -0,0 +1,59 @@
+import time
+from typing import Callable
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.http import HttpRequest, HttpResponse
+from django.template import engines
+from django.template.response import TemplateResponse
+from django.test import RequestFactory
+
+from searcher.instrumentation import PerformanceMiddleware, histograms
+
+TEMPLATE = engines["django"].from_string("{% for i in items %}<li>{{ i }}</li>{% endfor %}")
+
+
+def view(request: HttpRequest) -> HttpResponse:
+    return TemplateResponse(request, TEMPLATE, {"items": range(10)})
+
+
+def view_with_middleware_hooks(middleware: PerformanceMiddleware) -> Callable:
+    """
+    Mimics BaseHandler: view -> process_template_response -> render.
+    """
+
+    def get_response(request: HttpRequest) -> HttpResponse:
+        response = middleware.process_template_response(request, view(request))
+        return response.render()
+
+    return get_response
+
+
+class Command(BaseCommand):
+    """
+    Measures overhead, which PerformanceMiddleware adds to a single request.
+    """
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument("--iterations", "-n", type=int, default=20000)
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        request = RequestFactory().get("/")
+        middleware = PerformanceMiddleware(view)
+        middleware.get_response = view_with_middleware_hooks(middleware)
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            view(request).render()
+        bare = (time.perf_counter() - start) / iterations
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            middleware(request)
+        instrumented = (time.perf_counter() - start) / iterations
+        histograms.reset()
+
+        self.stdout.write(
+            f"bare={bare * 1e6:.1f}us instrumented={instrumented * 1e6:.1f}us "
+            f"overhead={(instrumented - bare) * 1e6:.1f}us/request"
+        )
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandParser
+from django.template.loader import get_template
+from django.test import RequestFactory
+
+from searcher.benchmarks import (
+    TEMPLATE_NAMES,
+    get_reference_template,
+    make_context,
+    measure,
+)
+
+
+class Command(BaseCommand):
+    """
+    Compares render time of search and detail templates with the {% url %} per row
+    (benchmarks/reference_templates) and with the detail_links tag.
+    """
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "--rows", type=int, nargs="+", default=[10, 1000, 100000], help="Links per list"
+        )
+        parser.add_argument(
+            "--min-time", type=float, default=1, help="Seconds to spend on every measurement"
+        )
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get("/")
+        for template_name in TEMPLATE_NAMES:
+            reference = get_reference_template(template_name)
+            fast = get_template(template_name)
+            for rows in options["rows"]:
+                context = make_context(template_name, rows)
+                reference_time = measure(
+                    lambda: reference.render(context, request), options["min_time"]
+                )
+                fast_time = measure(lambda: fast.render(context, request), options["min_time"])
+                self.stdout.write(
+                    f"{template_name:<12} rows={rows:<7} url_tag={reference_time * 1000:.2f}ms "
+                    f"detail_links={fast_time * 1000:.2f}ms "
+                    f"speedup={reference_time / fast_time:.1f}x"
+                )
@@ -0,0 +1,161 @@
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.urls import reverse
+
+from searcher.benchmarks import summarize
+from searcher.models import Actor, Movie
+
+SERVING_MODES = ("wsgi", "asgi")
+HOST = "127.0.0.1"
+STARTUP_TIMEOUT = 30
+
+
+class Command(BaseCommand):
+    """
+    Load-tests the app served through WSGI (gunicorn with threads) and through ASGI
+    (uvicorn with async views) on the same DB,
+    comparing throughput and latency percentiles at high concurrency.
+    """
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument("--concurrency", "-c", type=int, default=200, help="Open connections")
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds per server")
+        parser.add_argument("--workers", type=int, default=1, help="Server worker processes")
+        parser.add_argument(
+            "--threads", type=int, default=8, help="Threads per WSGI worker process"
+        )
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if not Actor.objects.exists():
+            raise CommandError("DB is empty, run parse_csfd or generate_dataset first.")
+        paths = request_paths(random.Random(options["seed"]))
+
+        for mode in SERVING_MODES:
+            server = start_server(mode, options["port"], options["workers"], options["threads"])
+            try:
+                result = asyncio.run(
+                    load(options["port"], paths, options["concurrency"], options["duration"])
+                )
+            finally:
+                server.terminate()
+                server.wait()
+            self.stdout.write(
+                f"{mode}: requests={result['n']} errors={result['errors']} "
+                f"throughput={result['throughput_rps']:.1f}/s "
+                f"p50={result['p50_ms']:.2f}ms p99={result['p99_ms']:.2f}ms"
+            )
+
+
+def request_paths(rng: random.Random, num_paths: int = 1000) -> list[str]:
+    """
+    Mix of search and detail pages of existing movies and actors.
+    """
+    actor_slugs = list(Actor.objects.values_list("slug", flat=True)[:num_paths])
+    movie_slugs = list(Movie.objects.values_list("slug", flat=True)[:num_paths])
+    names = list(Actor.objects.values_list("name", flat=True)[:num_paths])
+    paths = []
+    for _ in range(num_paths):
+        kind = rng.choice(("search", "actor", "movie"))
+        if kind == "search":
+            paths.append(f"{reverse('search')}?q={rng.choice(rng.choice(names).split())[:4]}")
+        elif kind == "actor":
+            paths.append(reverse("actor-detail", args=[rng.choice(actor_slugs)]))
+        else:
+            paths.append(reverse("movie-detail", args=[rng.choice(movie_slugs or actor_slugs)]))
+    return [path.encode("ascii", "ignore").decode() for path in paths]
+
+
+def start_server(mode: str, port: int, workers: int, threads: int) -> subprocess.Popen:
+    env = {**os.environ, "DJANGO_DEBUG": "0", "ASYNC_VIEWS": "1" if mode == "asgi" else "0"}
+    # fmt: off
+    if mode == "asgi":
+        command = [
+            sys.executable, "-m", "uvicorn", "core.asgi:application",
+            "--host", HOST, "--port", str(port),
+            "--workers", str(workers),
+            "--log-level", "warning", "--no-access-log",
+        ]
+    else:
+        command = [
+            sys.executable, "-m", "gunicorn", "core.wsgi:application",
+            "--bind", f"{HOST}:{port}",
+            "--workers", str(workers),
+            "--worker-class", "gthread", "--threads", str(threads),
+            "--log-level", "warning",
+        ]
+    # fmt: on
+    server = subprocess.Popen(command, env=env)
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((HOST, port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise CommandError(f"{mode} server did not start in {STARTUP_TIMEOUT}s.")
+
+
+async def load(port: int, paths: list[str], concurrency: int, duration: float) -> dict[str, Any]:
+    """
+    Keeps `concurrency` keep-alive connections busy for `duration` seconds.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration
+    latencies: list[float] = []
+    errors = 0
+
+    async def client(number: int) -> None:
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(HOST, port)
+        while loop.time() < deadline:
+            path = paths[number % len(paths)]
+            number += concurrency
+            start = time.perf_counter()
+            try:
+                writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+                status = await read_response(reader)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                errors += 1
+                writer.close()
+                reader, writer = await asyncio.open_connection(HOST, port)
+                continue
+            if status >= 500:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(number) for number in range(concurrency)))
+    return {**summarize(latencies, time.perf_counter() - start), "errors": errors}
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    """
+    Reads a single HTTP/1.1 response with Content-Length.
+    @return: status code.
+    """
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("Server closed the connection")
+    status = int(status_line.split()[1])
+    content_length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            content_length = int(value)
+    await reader.readexactly(content_length)
+    return status
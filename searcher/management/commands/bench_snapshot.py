@@ -0,0 +1,121 @@
+import multiprocessing
+import random
+import resource
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connections
+
+from searcher import services, snapshot
+from searcher.benchmarks import MEMORY_FIELDS, read_memory
+from searcher.models import Actor, Movie
+
+
+class Command(BaseCommand):
+    """
+    Compares throughput and memory per worker process of serving search and detail lookups
+    from the ORM and from the memory-mapped dataset snapshot.
+    """
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument("--workers", type=int, default=4, help="Num of worker processes")
+        parser.add_argument("--lookups", type=int, default=2000, help="Lookups per worker")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if not Actor.objects.exists():
+            raise CommandError("DB is empty, run parse_csfd or generate_dataset first.")
+        rng = random.Random(options["seed"])
+        actor_slugs = list(Actor.objects.values_list("slug", flat=True)[:10000])
+        movie_slugs = list(Movie.objects.values_list("slug", flat=True)[:10000])
+        names = list(Actor.objects.values_list("name", flat=True)[:1000])
+        lookups = []
+        for _ in range(options["lookups"]):
+            kind = rng.choice(("search", "actor", "movie"))
+            if kind == "search":
+                lookups.append((kind, rng.choice(rng.choice(names).split())[:4]))
+            else:
+                lookups.append((kind, rng.choice(actor_slugs if kind == "actor" else movie_slugs)))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            snapshot_path = Path(tmp_dir) / "snapshot.bin"
+            snapshot.build_snapshot(snapshot_path)
+            self.stdout.write(f"Snapshot size: {snapshot_path.stat().st_size / 2**20:.1f}MB")
+            for mode in ("orm", "snapshot"):
+                results = run_workers(mode, lookups, snapshot_path, options["workers"])
+                for worker, result in enumerate(results):
+                    memory = " ".join(f"{field}={result[field]}kB" for field in MEMORY_FIELDS)
+                    self.stdout.write(
+                        f"{mode:>8} worker {worker}: {result['throughput']:.0f} lookups/s "
+                        f"max_rss={result['max_rss']}kB {memory}"
+                    )
+
+
+def run_workers(
+    mode: str, lookups: list[tuple[str, str]], snapshot_path: Path, num_workers: int
+) -> list[dict[str, Any]]:
+    # Forked workers must not share DB connections of the parent.
+    connections.close_all()
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    workers = [
+        context.Process(target=worker, args=(mode, lookups, snapshot_path, queue))
+        for _ in range(num_workers)
+    ]
+    for process in workers:
+        process.start()
+    results = [queue.get() for _ in workers]
+    for process in workers:
+        process.join()
+    return results
+
+
+def worker(mode: str, lookups: list[tuple[str, str]], snapshot_path: Path, queue) -> None:
+    serve = (
+        serve_from_orm if mode == "orm" else serve_from_snapshot(snapshot.Snapshot(snapshot_path))
+    )
+    start = time.perf_counter()
+    for kind, value in lookups:
+        serve(kind, value)
+    elapsed = time.perf_counter() - start
+    queue.put(
+        {
+            "throughput": len(lookups) / elapsed,
+            "max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            **read_memory(),
+        }
+    )
+
+
+def serve_from_orm(kind: str, value: str) -> None:
+    if kind == "search":
+        for rows in services.get_movies_and_actors_by_query(value):
+            consume(rows)
+    elif kind == "actor":
+        consume(services.get_actor_by_slug(value).movies.all())
+    else:
+        consume(services.get_movie_by_slug(value).actors.all())
+
+
+def serve_from_snapshot(dataset: snapshot.Snapshot) -> Callable[[str, str], None]:
+    def serve(kind: str, value: str) -> None:
+        if kind == "search":
+            for rows in dataset.search(value):
+                consume(rows)
+        else:
+            record = dataset.get_by_slug(getattr(dataset, f"{kind}s"), value)
+            assert record is not None
+            consume(record.movies.all() if kind == "actor" else record.actors.all())
+
+    return serve
+
+
+def consume(rows) -> None:
+    """
+    Touches what a template would render.
+    """
+    for row in rows:
+        row.name, row.slug
@@ -0,0 +1,184 @@
+import random
+import sqlite3
+import string
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from core.db.base import apply_pragmas
+from searcher.benchmarks import summarize
+
+SCHEMA = """
+CREATE TABLE searcher_actor (
+    id integer NOT NULL PRIMARY KEY AUTOINCREMENT,
+    name varchar(1000) NOT NULL,
+    slug varchar(50) NOT NULL UNIQUE,
+    csfd_id integer NOT NULL
+);
+CREATE TABLE searcher_movie (
+    id integer NOT NULL PRIMARY KEY AUTOINCREMENT,
+    name varchar(1000) NOT NULL,
+    slug varchar(50) NOT NULL UNIQUE
+);
+CREATE TABLE searcher_movie_actors (
+    id integer NOT NULL PRIMARY KEY AUTOINCREMENT,
+    movie_id bigint NOT NULL REFERENCES searcher_movie (id),
+    actor_id bigint NOT NULL REFERENCES searcher_actor (id)
+);
+"""
+
+# Single-word search statements, as the ORM produced them before the query planner.
+SEARCH_QUERIES = (
+    "SELECT id, name, slug FROM searcher_movie WHERE name LIKE ? ESCAPE '\\' ORDER BY slug",
+    "SELECT id, name, slug, csfd_id FROM searcher_actor WHERE name LIKE ? ESCAPE '\\' "
+    "ORDER BY slug",
+)
+
+ACTORS_PER_MOVIE = 15
+
+
+def random_name() -> str:
+    return " ".join(
+        random.choice(string.ascii_uppercase) + "".join(random.choices(string.ascii_lowercase, k=6))
+        for _ in range(2)
+    )
+
+
+class Command(BaseCommand):
+    """
+    Measures search latency while a parser-like writer inserts movies into the same sqlite file.
+    Compares the stock setup (rollback journal, new connection per query)
+    with the tuned one (WAL + pragmas, persistent read-only connections).
+    """
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument("--movies", type=int, default=3000, help="Movies to pre-populate")
+        parser.add_argument("--readers", type=int, default=4, help="Concurrent search threads")
+        parser.add_argument("--duration", type=float, default=5.0, help="Seconds per scenario")
+        parser.add_argument("--query", default="an", help="Searched substring")
+
+    def handle(self, *args, **options):
+        for scenario, pragmas, persistent in (
+            ("stock", {}, False),
+            ("tuned", settings.DATABASE_PRAGMAS, True),
+        ):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                db_path = Path(tmp_dir) / "bench.sqlite3"
+                populate(db_path, options["movies"], pragmas)
+                result = run_scenario(
+                    db_path,
+                    pragmas,
+                    persistent,
+                    options["readers"],
+                    options["duration"],
+                    options["query"],
+                )
+            self.stdout.write(
+                f"{scenario:>6}: searches={result['n']} "
+                f"p50={result['p50_ms']:.2f}ms p99={result['p99_ms']:.2f}ms "
+                f"max={result['max_ms']:.2f}ms errors={result['errors']} "
+                f"written_movies={result['written']}"
+            )
+
+
+def connect(db_path: Path, pragmas: dict, read_only: bool = False) -> sqlite3.Connection:
+    if read_only:
+        conn = sqlite3.connect(
+            f"{db_path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False
+        )
+    else:
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+    apply_pragmas(conn, pragmas, read_only=read_only)
+    return conn
+
+
+def populate(db_path: Path, num_movies: int, pragmas: dict) -> None:
+    conn = connect(db_path, pragmas)
+    with conn:
+        conn.executescript(SCHEMA)
+    insert_movies(conn, num_movies)
+    conn.close()
+
+
+def insert_movies(conn: sqlite3.Connection, num_movies: int) -> None:
+    """
+    Inserts movies the way services.create_movie_with_actors does: one transaction per movie.
+    """
+    for _ in range(num_movies):
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO searcher_movie (name, slug) VALUES (?, hex(randomblob(16)))",
+                (random_name(),),
+            )
+            movie_id = cursor.lastrowid
+            for _ in range(ACTORS_PER_MOVIE):
+                cursor = conn.execute(
+                    "INSERT INTO searcher_actor (name, slug, csfd_id) "
+                    "VALUES (?, hex(randomblob(16)), abs(random()))",
+                    (random_name(),),
+                )
+                conn.execute(
+                    "INSERT INTO searcher_movie_actors (movie_id, actor_id) VALUES (?, ?)",
+                    (movie_id, cursor.lastrowid),
+                )
+
+
+def run_scenario(
+    db_path: Path,
+    pragmas: dict,
+    persistent: bool,
+    num_readers: int,
+    duration: float,
+    query: str,
+) -> dict:
+    stop = threading.Event()
+    latencies: list[float] = []
+    errors: list[Exception] = []
+    written = [0]
+
+    def writer() -> None:
+        conn = connect(db_path, pragmas)
+        while not stop.is_set():
+            try:
+                insert_movies(conn, 1)
+                written[0] += 1
+            except sqlite3.OperationalError as e:
+                errors.append(e)
+        conn.close()
+
+    def reader() -> None:
+        # Stock setup mimics CONN_MAX_AGE = 0, where every request opens a new connection.
+        persistent_conn = connect(db_path, pragmas, read_only=True) if persistent else None
+        param = f"%{query}%"
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                conn = persistent_conn or connect(db_path, pragmas)
+                for sql in SEARCH_QUERIES:
+                    conn.execute(sql, (param,)).fetchall()
+                if conn is not persistent_conn:
+                    conn.close()
+            except sqlite3.OperationalError as e:
+                errors.append(e)
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=writer)]
+    threads += [threading.Thread(target=reader) for _ in range(num_readers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        **summarize(latencies, time.perf_counter() - start),
+        "errors": len(errors),
+        "written": written[0],
+    }
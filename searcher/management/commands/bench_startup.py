@@ -0,0 +1,35 @@
+import statistics
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from searcher.benchmarks import PROBES, PROFILES, run_probe
+
+
+class Command(BaseCommand):
+    """
+    Measures cold start of a web worker and of parse_csfd in development and production profiles:
+    import time, latency of the first request and idle RSS after it.
+    """
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument("--repeats", type=int, default=5, help="Fresh processes per probe")
+        parser.add_argument("--path", default="/", help="Path of the first web request")
+        parser.add_argument("--query", default="", help="Query string of the first web request")
+
+    def handle(self, *args, **options):
+        for target in PROBES:
+            for profile in PROFILES:
+                results = [
+                    run_probe(target, profile, options["path"], options["query"])
+                    for _ in range(options["repeats"])
+                ]
+                medians = {
+                    metric: statistics.median(result[metric] for result in results)
+                    for metric in ("process_ms", "import_ms", "first_ms", "rss_kb")
+                }
+                self.stdout.write(
+                    f"{target:<10} {profile:<11} process={medians['process_ms']:.0f}ms "
+                    f"import={medians['import_ms']:.0f}ms first={medians['first_ms']:.1f}ms "
+                    f"rss={medians['rss_kb'] / 1024:.1f}MB "
+                    f"heavy_modules={','.join(results[0]['heavy_modules']) or '-'}"
+                )
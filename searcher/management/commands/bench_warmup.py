@@ -0,0 +1,84 @@
+import gc
+import multiprocessing
+import random
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import connections
+from django.template.loader import get_template
+
+from searcher import services, warmup
+from searcher.benchmarks import MEMORY_FIELDS, read_memory
+from searcher.models import Actor, Movie
+
+
+class Command(BaseCommand):
+    """
+    Compares memory of forked worker processes, which warm up each by itself after fork (cold),
+    with workers forked from a master warmed up by searcher.warmup (prefork).
+    Shared_* memory is shared between workers, Private_* is paid by every worker.
+    """
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument("--workers", type=int, default=4, help="Num of worker processes")
+        parser.add_argument("--lookups", type=int, default=2000, help="Detail pages per worker")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if not Actor.objects.exists():
+            raise CommandError("DB is empty, run parse_csfd or generate_dataset first.")
+        rng = random.Random(options["seed"])
+        slugs = [
+            (model, slug)
+            for model in (Actor, Movie)
+            for slug in model.objects.values_list("slug", flat=True)[:10000]
+        ]
+        lookups = [rng.choice(slugs) for _ in range(options["lookups"])]
+
+        for mode in ("cold", "prefork"):
+            start = time.perf_counter()
+            if mode == "prefork":
+                warmup.warm_up()
+            master_warm_up = time.perf_counter() - start
+            results = run_workers(mode, lookups, options["workers"])
+            for worker_number, result in enumerate(results):
+                memory = " ".join(f"{field}={result[field]}kB" for field in MEMORY_FIELDS)
+                self.stdout.write(
+                    f"{mode:>8} worker {worker_number}: "
+                    f"warm_up={(master_warm_up + result['warm_up']) * 1000:.0f}ms "
+                    f"first={result['first'] * 1000:.1f}ms {memory}"
+                )
+            gc.unfreeze()
+
+
+def run_workers(mode: str, lookups: list, num_workers: int) -> list[dict[str, Any]]:
+    # Forked workers must not share DB connections of the parent.
+    connections.close_all()
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    workers = [
+        context.Process(target=worker, args=(mode, lookups, queue)) for _ in range(num_workers)
+    ]
+    for process in workers:
+        process.start()
+    results = [queue.get() for _ in workers]
+    for process in workers:
+        process.join()
+    return results
+
+
+def worker(mode: str, lookups: list, queue) -> None:
+    start = time.perf_counter()
+    if mode == "cold":
+        warmup.warm_up(freeze=False)
+    warmed_up = time.perf_counter()
+    first = None
+    for model, slug in lookups:
+        instance = services.get_entity_by_slug(model, slug)
+        template_name = "actor.html" if model is Actor else "movie.html"
+        context_object_name = "actor" if model is Actor else "movie"
+        get_template(template_name).render({"object": instance, context_object_name: instance})
+        if first is None:
+            first = time.perf_counter() - warmed_up
+    queue.put({"warm_up": warmed_up - start, "first": first, **read_memory()})
@@ -0,0 +1,192 @@
+import random
+import time
+from multiprocessing.pool import ThreadPool
+from pathlib import Path
+from typing import Any, Callable, Type
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import transaction
+from django.db.models import Max, Min, Model
+from django.http import HttpRequest
+from django.test import RequestFactory
+from django.urls import reverse
+
+from searcher import benchmarks, services, views
+from searcher.models import Actor, Movie
+
+ACTORS_PER_CREATED_MOVIE = 15
+
+
+class Command(BaseCommand):
+    """
+    Measures latency percentiles and throughput of search and detail views
+    and of services.create_movie_with_actors on the current DB,
+    saves results as json and compares them against a stored baseline.
+    Use generate_dataset command to get a DB of a required scale.
+    """
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument("--requests", "-n", type=int, default=200, help="Calls per benchmark")
+        parser.add_argument("--concurrency", "-c", type=int, default=1, help="Num of threads")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--output", type=Path, help="Where to save results as json, nothing is saved if omitted"
+        )
+        parser.add_argument("--baseline", type=Path, default=benchmarks.BASELINE_PATH)
+        parser.add_argument(
+            "--update-baseline", action="store_true", help="Save results as a new baseline"
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Allowed relative slowdown against baseline, fails with higher one",
+        )
+
+    def handle(self, *args, **options):
+        if not Actor.objects.exists() or not Movie.objects.exists():
+            raise CommandError("DB is empty, run parse_csfd or generate_dataset first.")
+        rng = random.Random(options["seed"])
+        num_requests, concurrency = options["requests"], options["concurrency"]
+
+        results = {
+            "SearchView": run_benchmark(search_calls(rng, num_requests), concurrency, render=True),
+            "ActorView": run_benchmark(
+                detail_calls(Actor, views.ActorView, "actor-detail", rng, num_requests),
+                concurrency,
+                render=True,
+            ),
+            "MovieView": run_benchmark(
+                detail_calls(Movie, views.MovieView, "movie-detail", rng, num_requests),
+                concurrency,
+                render=True,
+            ),
+            # Writes are serialized by sqlite anyway, so they are measured in a single thread.
+            "create_movie_with_actors": benchmark_create_movie_with_actors(rng, num_requests),
+        }
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name}: n={result['n']} p50={result['p50_ms']:.2f}ms "
+                f"p99={result['p99_ms']:.2f}ms throughput={result['throughput_rps']:.1f}/s"
+            )
+
+        output = {
+            "meta": {
+                "actors": Actor.objects.count(),
+                "movies": Movie.objects.count(),
+                "requests": num_requests,
+                "concurrency": concurrency,
+            },
+            "results": results,
+        }
+        if options["output"]:
+            benchmarks.save_results(options["output"], output)
+
+        baseline = benchmarks.load_results(options["baseline"])
+        if options["update_baseline"]:
+            benchmarks.save_results(options["baseline"], output)
+            self.stdout.write(f"Baseline saved to {options['baseline']}")
+        elif baseline is not None:
+            report, regressions = benchmarks.compare_results(
+                results, baseline["results"], options["threshold"]
+            )
+            self.stdout.write("\n".join(["Compared to baseline:", *report]))
+            if regressions:
+                raise CommandError(f"Performance regressed: {', '.join(regressions)}")
+
+
+def run_benchmark(
+    calls: list[Callable[[], Any]], concurrency: int, render: bool = False
+) -> dict[str, Any]:
+    """
+    Runs all calls in a thread pool, measuring latency of each one.
+    @param render: bool, whether result of a call is a TemplateResponse to be rendered.
+    """
+
+    def timed(call: Callable[[], Any]) -> float:
+        start = time.perf_counter()
+        result = call()
+        if render:
+            result.render()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPool(concurrency) as pool:
+        latencies = pool.map(timed, calls)
+    return benchmarks.summarize(latencies, time.perf_counter() - start)
+
+
+def make_request(path: str) -> HttpRequest:
+    return RequestFactory(SERVER_NAME="localhost").get(path)
+
+
+def search_calls(rng: random.Random, num_calls: int) -> list[Callable[[], Any]]:
+    """
+    Searches by parts of existing actor and movie names, so the queries have results.
+    """
+    names = []
+    for model in (Actor, Movie):
+        low, high = id_range(model)
+        ids = {rng.randint(low, high) for _ in range(num_calls // 2)}
+        names += list(model.objects.filter(pk__in=ids).values_list("name", flat=True))
+    if not names:
+        names = ["a"]
+    view = views.SearchView.as_view()
+    calls = []
+    for _ in range(num_calls):
+        word = rng.choice(rng.choice(names).split())
+        request = make_request(f"{reverse('search')}?q={word[:5]}")
+        calls.append(lambda request=request: view(request))
+    return calls
+
+
+def detail_calls(
+    model: Type[Model],
+    view_class: type,
+    url_name: str,
+    rng: random.Random,
+    num_calls: int,
+) -> list[Callable[[], Any]]:
+    low, high = id_range(model)
+    slugs = list(
+        model.objects.filter(pk__in={rng.randint(low, high) for _ in range(num_calls)}).values_list(
+            "slug", flat=True
+        )
+    )
+    view = view_class.as_view()
+    calls = []
+    for _ in range(num_calls):
+        slug = rng.choice(slugs)
+        request = make_request(reverse(url_name, args=[slug]))
+        calls.append(lambda request=request, slug=slug: view(request, slug=slug))
+    return calls
+
+
+def id_range(model: Type[Model]) -> tuple[int, int]:
+    bounds = model.objects.aggregate(low=Min("id"), high=Max("id"))
+    return bounds["low"], bounds["high"]
+
+
+def benchmark_create_movie_with_actors(rng: random.Random, num_calls: int) -> dict[str, Any]:
+    """
+    Creates movies with half of the cast being existing actors, half new ones.
+    Everything is rolled back afterwards, so the DB stays the same.
+    """
+    existing_csfd_ids = list(
+        Actor.objects.values_list("csfd_id", "name")[: num_calls * ACTORS_PER_CREATED_MOVIE]
+    )
+    latencies = []
+    with transaction.atomic():
+        start = time.perf_counter()
+        for i in range(num_calls):
+            cast = rng.sample(existing_csfd_ids, min(len(existing_csfd_ids), 8))
+            actors = tuple(services.ActorDTO(name, str(csfd_id)) for csfd_id, name in cast) + tuple(
+                services.ActorDTO(f"Benchmark Actor {i}-{j}", str(-(i * 100 + j)))
+                for j in range(ACTORS_PER_CREATED_MOVIE - len(cast))
+            )
+            call_start = time.perf_counter()
+            services.create_movie_with_actors(services.MovieDTO(f"Benchmark Movie {i}", actors))
+            latencies.append(time.perf_counter() - call_start)
+        elapsed = time.perf_counter() - start
+        transaction.set_rollback(True)
+    return benchmarks.summarize(latencies, elapsed)
@@ -0,0 +1,23 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from searcher import snapshot, warmup
+
+
+class Command(BaseCommand):
+    """
+    Builds read-only dataset snapshot from the current DB.
+    parse_csfd and generate_dataset do it automatically, use this after changing the DB
+    by other means.
+    Gunicorn workers are reloaded afterwards, see searcher.warmup.
+    """
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument("--path", type=Path, default=settings.SNAPSHOT_PATH)
+
+    def handle(self, *args, **options):
+        snapshot.build_snapshot(options["path"])
+        self.stdout.write(f"Snapshot saved to {options['path']}")
+        warmup.notify_dataset_changed()
@@ -0,0 +1,184 @@
+import math
+import random
+from typing import Iterator, Type
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import transaction
+from django.db.models import Max, Model
+from django.utils.text import slugify
+from faker.providers.lorem.cs_CZ import Provider as CzechLoremProvider
+from faker.providers.person.cs_CZ import Provider as CzechPersonProvider
+
+from searcher import services, snapshot, warmup
+from searcher.models import Actor, Movie
+
+# Keeps synthetic actors away from real CSFD ids, which are way below this number.
+SYNTHETIC_CSFD_ID_OFFSET = 1_000_000_000
+
+MOVIE_WORDS = tuple(word for word in CzechLoremProvider.word_list if len(word) > 2)
+
+
+class Command(BaseCommand):
+    """
+    Bulk-creates a synthetic dataset of movies and actors for benchmarking at scale.
+    Actors have Czech names, number of movies per actor follows a power law:
+    few actors star in many movies, most of them star in one or two.
+    """
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument("--actors", type=int, default=10_000, help="Num of actors to create")
+        parser.add_argument(
+            "--movies", type=int, help="Num of movies to create, defaults to actors / 5"
+        )
+        parser.add_argument(
+            "--cast-size", type=int, default=15, help="Mean num of actors in a movie"
+        )
+        parser.add_argument(
+            "--zipf-exponent",
+            type=float,
+            default=0.6,
+            help="Exponent of actors popularity distribution, higher is more skewed",
+        )
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--clean", action="store_true", help="Delete existing movies and actors first"
+        )
+
+    def handle(self, *args, **options):
+        num_actors = options["actors"]
+        num_movies = options["movies"] if options["movies"] is not None else num_actors // 5
+        if num_actors < 1 or num_movies < 0:
+            raise CommandError("At least one actor and non-negative num of movies is required.")
+        if options["clean"]:
+            services.clean_db()
+
+        rng = random.Random(options["seed"])
+        first_actor_id = next_id(Actor)
+        for created in create_actors(first_actor_id, num_actors, options["batch_size"], rng):
+            self.stdout.write(f"Actors: {created}/{num_actors}")
+
+        popularity = ActorPopularity(first_actor_id, num_actors, options["zipf_exponent"], rng)
+        for created in create_movies(
+            next_id(Movie), num_movies, options["cast_size"], popularity, options["batch_size"], rng
+        ):
+            self.stdout.write(f"Movies: {created}/{num_movies}")
+        # Otherwise workers would keep serving the previous dataset from the snapshot.
+        self.stdout.write("Building dataset snapshot")
+        snapshot.build_snapshot(settings.SNAPSHOT_PATH)
+        warmup.notify_dataset_changed()
+
+
+def next_id(model: Type[Model]) -> int:
+    return (model.objects.aggregate(max_id=Max("id"))["max_id"] or 0) + 1
+
+
+def actor_name(rng: random.Random) -> str:
+    if rng.random() < 0.5:
+        first_names, last_names = (
+            CzechPersonProvider.first_names_male,
+            CzechPersonProvider.last_names_male,
+        )
+    else:
+        first_names, last_names = (
+            CzechPersonProvider.first_names_female,
+            CzechPersonProvider.last_names_female,
+        )
+    return f"{rng.choice(first_names)} {rng.choice(last_names)}"
+
+
+def movie_name(rng: random.Random) -> str:
+    return " ".join(rng.choices(MOVIE_WORDS, k=rng.randint(1, 4))).capitalize()
+
+
+class ActorPopularity:
+    """
+    Samples actor ids with Zipf-like (power law) probabilities, without keeping
+    a weight per actor in memory, so it works for tens of millions of actors.
+    """
+
+    def __init__(self, first_id: int, num_actors: int, exponent: float, rng: random.Random):
+        self.first_id = first_id
+        self.num_actors = num_actors
+        self.exponent = exponent
+        self.rng = rng
+        # Most popular ranks are scattered over ids by a multiplicative permutation,
+        # otherwise the first created actors would always be the most popular ones.
+        self.multiplier = int(num_actors * 0.618) or 1
+        while math.gcd(self.multiplier, num_actors) != 1:
+            self.multiplier += 1
+
+    def sample_rank(self) -> int:
+        """
+        Inverse transform sampling of continuous power law on [1, num_actors + 1).
+        """
+        u = self.rng.random()
+        if self.exponent == 1:
+            rank = (self.num_actors + 1) ** u
+        else:
+            one_minus_s = 1 - self.exponent
+            upper = (self.num_actors + 1) ** one_minus_s
+            rank = ((upper - 1) * u + 1) ** (1 / one_minus_s)
+        return min(int(rank), self.num_actors) - 1
+
+    def sample(self) -> int:
+        return self.first_id + self.sample_rank() * self.multiplier % self.num_actors
+
+
+def create_actors(
+    first_id: int, num_actors: int, batch_size: int, rng: random.Random
+) -> Iterator[int]:
+    """
+    Creates actors in batches with explicit ids, bulk_create does not trigger
+    slug signals, so slugs are composed here the same way.
+    @return: iterator over num of created actors after each batch.
+    """
+    for batch_start in range(0, num_actors, batch_size):
+        actors = []
+        for pk in range(
+            first_id + batch_start, first_id + min(batch_start + batch_size, num_actors)
+        ):
+            name = actor_name(rng)
+            actors.append(
+                Actor(
+                    id=pk,
+                    name=name,
+                    slug=slugify(f"{pk}-{name}"),
+                    csfd_id=SYNTHETIC_CSFD_ID_OFFSET + pk,
+                )
+            )
+        with transaction.atomic():
+            Actor.objects.bulk_create(actors)
+        yield batch_start + len(actors)
+
+
+def create_movies(
+    first_id: int,
+    num_movies: int,
+    cast_size: int,
+    popularity: ActorPopularity,
+    batch_size: int,
+    rng: random.Random,
+) -> Iterator[int]:
+    """
+    Creates movies in batches with casts sampled by actors popularity.
+    @return: iterator over num of created movies after each batch.
+    """
+    Through = Movie.actors.through
+    for batch_start in range(0, num_movies, batch_size):
+        movies, casts = [], []
+        for pk in range(
+            first_id + batch_start, first_id + min(batch_start + batch_size, num_movies)
+        ):
+            name = movie_name(rng)
+            movies.append(Movie(id=pk, name=name, slug=slugify(f"{pk}-{name}")))
+            cast = {
+                popularity.sample()
+                for _ in range(rng.randint(max(1, cast_size // 3), max(1, cast_size * 5 // 3)))
+            }
+            casts.extend(Through(movie_id=pk, actor_id=actor_id) for actor_id in cast)
+        with transaction.atomic():
+            Movie.objects.bulk_create(movies)
+            Through.objects.bulk_create(casts)
+        yield batch_start + len(movies)
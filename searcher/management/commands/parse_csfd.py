@@ -1,24 +1,35 @@
 import logging
+import sys
 from functools import partial
 from multiprocessing.pool import ThreadPool
-from typing import Optional
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Optional
 from urllib.parse import urljoin
 
-import requests
-from bs4 import BeautifulSoup
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError, CommandParser
-from tenacity import Retrying, stop_after_attempt, wait_exponential
 
-from searcher import services
+from searcher import services, snapshot, warmup
+from searcher.profiling import StageProfiler
+
+# Parsing and HTTP libraries are imported where they are used,
+# so other commands, --help and the web workers do not pay for loading them.
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+    from lxml import etree
+    from tenacity import Retrying
 
 REQUEST_HEADERS = {"User-Agent": settings.PARSER_USER_AGENT}
 RETRY_ATTEMPTS = 2
-
-lxml_soup = partial(BeautifulSoup, features="lxml")
+# The list of movies is streamed and parsed by chunks of that size.
+LIST_CHUNK_SIZE = 16 * 1024
+MOVIE_LINK_CLASS = "film-title-name"
 
 logger = logging.getLogger("parser")
 
+# Profiles fetch, parse and db_write stages, when the command is run with --profile.
+profiler = StageProfiler()
+
 
 class Command(BaseCommand):
     """
@@ -33,12 +44,26 @@ class Command(BaseCommand):
             default=10,
             help="Num of threads to simultaneously process movies parsing",
         )
+        parser.add_argument(
+            "--profile",
+            type=Path,
+            metavar="DIR",
+            help="Save cProfile dumps of fetch, parse and db_write stages into provided directory",
+        )
 
     def handle(self, *args, **options):
         if not services.is_db_empty():
             handle_db_rewrite()
         logger.info("Starting parsing CSFD movies.")
+        if options["profile"]:
+            profiler.enable()
         parse_movies_and_actors_to_db(settings.PARSER_BASE_URL, options["num_threads"])
+        logger.info("Building dataset snapshot.")
+        snapshot.build_snapshot(settings.SNAPSHOT_PATH)
+        warmup.notify_dataset_changed()
+        if options["profile"]:
+            for path in profiler.dump(options["profile"]):
+                logger.info("Profile saved to %s", path)
 
 
 def handle_db_rewrite() -> None:
@@ -60,44 +85,100 @@ def parse_movies_and_actors_to_db(base_url: str, num_threads: int = 10) -> None:
     @param base_url: str, base url of CSFD website.
     @param num_threads: int, num of threads to run in parallel.
     """
-    movie_urls = parse_movie_urls(urljoin(base_url, "/zebricky/filmy/nejlepsi/?showMore=1"))
+    movie_urls = iter_movie_urls(urljoin(base_url, "/zebricky/filmy/nejlepsi/?showMore=1"))
     parse_movies_and_actors_with_base = partial(parse_movie_with_actors, base_url=base_url)
     with ThreadPool(num_threads) as pool:
-        movies_with_actors: list[Optional[services.MovieDTO]] = pool.map(
-            parse_movies_and_actors_with_base, movie_urls
+        # Unlike map, imap consumes urls lazily (in the pool's task handler thread),
+        # so movies are fetched while the list is still being parsed.
+        movies_with_actors: list[Optional[services.MovieDTO]] = list(
+            pool.imap(parse_movies_and_actors_with_base, movie_urls)
         )
-    for movie in filter(None, movies_with_actors):
-        services.create_movie_with_actors(movie)
+    with profiler.stage("db_write"):
+        identity_map = services.ActorIdentityMap.from_db()
+        for movie in filter(None, movies_with_actors):
+            services.create_movie_with_actors(movie, identity_map)
+
 
+def lxml_soup(markup: str) -> "BeautifulSoup":
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(markup, features="lxml")
+
+
+def retrying() -> "Retrying":
+    from tenacity import Retrying, stop_after_attempt, wait_exponential
+
+    return Retrying(
+        stop=stop_after_attempt(RETRY_ATTEMPTS),
+        wait=wait_exponential(multiplier=1),
+        reraise=True,
+    )
 
-def parse_movie_urls(list_url: str) -> tuple[str, ...]:
+
+def iter_movie_urls(list_url: str) -> Iterator[str]:
     """
-    Parses the list of movie urls from a provided url.
+    Streams the list of movies and yields movie urls as soon as they are parsed,
+    so movies are fetched while the rest of the list is still being downloaded and parsed.
+    Only opening the list is retried, urls were already handed out, when it fails midway.
     @param list_url: str, url, where movies list lives.
-    @return: tuple of movie urls.
+    @return: iterator of unique movie urls in the order of the list.
     """
+    import requests
+    from lxml import etree
+
     logger.debug("Parsing movies list")
     try:
-        for attempt in Retrying(
-            stop=stop_after_attempt(RETRY_ATTEMPTS),
-            wait=wait_exponential(multiplier=1),
-            reraise=True,
-        ):
-            with attempt:
-                r = requests.get(list_url, headers=REQUEST_HEADERS)
-                r.raise_for_status()
+        for attempt in retrying():
+            with attempt, profiler.stage("fetch"):
+                response = requests.get(list_url, headers=REQUEST_HEADERS, stream=True)
+                response.raise_for_status()
     except requests.exceptions.RequestException as e:
         raise CommandError(f"Couldn't parse the list o movies. Reason: {e}")
 
-    try:
-        soup = lxml_soup(r.text)
-        return tuple(
-            element.attrs["href"] for element in soup.find_all("a", class_="film-title-name")
-        )
-    except KeyError:
-        raise CommandError(
-            "Some parsed movies do not have a href attribute. Is search by attribute correct?"
-        )
+    seen: set[str] = set()
+    parser = etree.HTMLPullParser(events=("start", "end"), encoding=response.encoding)
+    with response:
+        chunks = response.iter_content(chunk_size=LIST_CHUNK_SIZE)
+        while True:
+            try:
+                with profiler.stage("fetch"):
+                    chunk = next(chunks, None)
+            except requests.exceptions.RequestException as e:
+                raise CommandError(f"Couldn't parse the list o movies. Reason: {e}")
+            with profiler.stage("parse"):
+                if chunk is None:
+                    parser.close()
+                else:
+                    parser.feed(chunk)
+                hrefs = read_movie_hrefs(parser)
+            for href in hrefs:
+                if href not in seen:
+                    seen.add(href)
+                    yield href
+            if chunk is None:
+                return
+
+
+def read_movie_hrefs(parser: "etree.HTMLPullParser") -> list[str]:
+    """
+    @return: hrefs of movie links, which the parser has seen since the last call.
+    """
+    hrefs = []
+    for event, element in parser.read_events():
+        if event == "end":
+            # Elements are not needed, once parsed, so a long list does not pile up in memory.
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+        elif element.tag == "a" and MOVIE_LINK_CLASS in element.get("class", "").split():
+            href = element.get("href")
+            if href is None:
+                raise CommandError(
+                    "Some parsed movies do not have a href attribute. "
+                    "Is search by attribute correct?"
+                )
+            hrefs.append(href)
+    return hrefs
 
 
 def parse_movie_with_actors(movie_url: str, base_url: str) -> Optional[services.MovieDTO]:
@@ -107,15 +188,13 @@ def parse_movie_with_actors(movie_url: str, base_url: str) -> Optional[services.
     @param base_url: str, base url of CSFD website.
     @return: Optional[services.MovieDTO], if any error happened, returns None
     """
+    import requests
+
     logger.debug("Parsing movie with url: %s", movie_url)
 
     try:
-        for attempt in Retrying(
-            stop=stop_after_attempt(RETRY_ATTEMPTS),
-            wait=wait_exponential(multiplier=1),
-            reraise=True,
-        ):
-            with attempt:
+        for attempt in retrying():
+            with attempt, profiler.stage("fetch"):
                 r = requests.get(urljoin(base_url, movie_url), headers=REQUEST_HEADERS)
                 r.raise_for_status()
     except requests.exceptions.RequestException:
@@ -123,7 +202,8 @@ def parse_movie_with_actors(movie_url: str, base_url: str) -> Optional[services.
         return None
 
     try:
-        return parse_movie_with_actors_from_html(r.text)
+        with profiler.stage("parse"):
+            return parse_movie_with_actors_from_html(r.text)
     except AttributeError:
         logger.exception("Movie info parsing failed, some crucial element was not found")
         return None
@@ -138,8 +218,12 @@ def parse_movie_with_actors_from_html(html_content: str) -> services.MovieDTO:
     soup = lxml_soup(html_content)
     movie_name = soup.find("div", class_="film-header-name").h1.text.strip()
     movie_actors_element = soup.find("h4", string="Hrají: ").parent.find("span")
+    # Same actors appear in many movies, interning keeps a single copy of their strings.
     all_actors = tuple(
-        services.ActorDTO(name=actor.get_text(), csfd_id=parse_actor_id_from_href(actor["href"]))
+        services.ActorDTO(
+            name=sys.intern(actor.get_text()),
+            csfd_id=sys.intern(parse_actor_id_from_href(actor["href"])),
+        )
         for actor in movie_actors_element.find_all("a", class_=lambda s: s != "more")
     )
     return services.MovieDTO(name=movie_name, actors=all_actors)
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.8 on 2026-10-18 23:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('searcher', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='actor',
+            name='csfd_id',
+            field=models.IntegerField(unique=True),
+        ),
+    ]
@@ -2,14 +2,32 @@ from typing import Union
 
 from django.db import models
 from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.dispatch import Signal, receiver
 from django.utils.text import slugify
 
 MOVIE_NAME_MAX_LENGTH = 1000
 ACTOR_NAME_MAX_LENGTH = 1000
 
+# Sent after a single movie or actor is deleted. Unlike post_delete, receivers of which turn
+# every QuerySet.delete into fetching and deleting rows one by one, bulk deletes don't send it.
+entity_deleted = Signal()
 
-class Movie(models.Model):
+
+class Entity(models.Model):
+    """
+    Base of movies and actors, which notifies entity_deleted receivers on deletion.
+    """
+
+    class Meta:
+        abstract = True
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        entity_deleted.send(sender=type(self), instance=self)
+        return result
+
+
+class Movie(Entity):
     """
     Represents a single movie entity.
     name is not unique, since some movies can potentially have same names.
@@ -23,15 +41,16 @@ class Movie(models.Model):
         ordering = ("slug",)
 
 
-class Actor(models.Model):
+class Actor(Entity):
     """
     Represents a single actor entity.
     Has an m2m connection with Movie model.
+    csfd_id is unique, parser identifies actors by it.
     """
 
     name = models.CharField(max_length=ACTOR_NAME_MAX_LENGTH)
     slug = models.SlugField(unique=True, db_index=True)
-    csfd_id = models.IntegerField()
+    csfd_id = models.IntegerField(unique=True)
 
     class Meta:
         ordering = ("slug",)
@@ -0,0 +1,160 @@
+"""
+Opt-in profiling of single web requests and parser stages.
+Profiles are saved in pstats format, which can be opened by pstats, snakeviz, gprof2dot etc.
+"""
+
+import asyncio
+import cProfile
+import hmac
+import logging
+import pstats
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Callable, ContextManager, Iterator
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.http import HttpRequest, HttpResponse
+
+logger = logging.getLogger("searcher.profiling")
+
+PROFILE_QUERY_PARAM = "__profile"
+PROFILE_HEADER = "HTTP_X_PROFILE"
+PROFILE_PATH_HEADER = "X-Profile-Path"
+
+
+def is_profiling_requested(request: HttpRequest) -> bool:
+    """
+    Request is profiled only if it came from INTERNAL_IPS with a profile flag (or header),
+    which matches PROFILING_TOKEN. INTERNAL_IPS alone are not enough:
+    behind a local reverse proxy every client comes from 127.0.0.1.
+    """
+    flag = request.GET.get(PROFILE_QUERY_PARAM) or request.META.get(PROFILE_HEADER)
+    if not flag or request.META.get("REMOTE_ADDR") not in settings.INTERNAL_IPS:
+        return False
+    token = settings.PROFILING_TOKEN
+    return bool(token) and hmac.compare_digest(flag, token)
+
+
+class ProfilingMiddleware:
+    """
+    Captures cProfile of a single request on demand and saves it to PROFILING_DIR.
+    Removed from the middleware chain completely, if PROFILING_ENABLED is off.
+    In async mode only the event loop thread is profiled.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        if not settings.PROFILING_TOKEN:
+            raise ImproperlyConfigured("PROFILING_TOKEN has to be set, if PROFILING_ENABLED is on.")
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Tells django handler, that this middleware instance is a coroutine function.
+            self._is_coroutine = asyncio.coroutines._is_coroutine  # type: ignore
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.is_async:
+            return self.__acall__(request)  # type: ignore
+        if not is_profiling_requested(request):
+            return self.get_response(request)
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profile.disable()
+        return self.save_profile(request, response, profile)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        if not is_profiling_requested(request):
+            return await self.get_response(request)  # type: ignore
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            response = await self.get_response(request)  # type: ignore
+        finally:
+            profile.disable()
+        return self.save_profile(request, response, profile)
+
+    @staticmethod
+    def save_profile(
+        request: HttpRequest, response: HttpResponse, profile: cProfile.Profile
+    ) -> HttpResponse:
+        path = Path(settings.PROFILING_DIR) / f"request-{time.time_ns()}.prof"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(path)
+        logger.info("Profile of %s saved to %s", request.get_full_path(), path)
+        response[PROFILE_PATH_HEADER] = str(path)
+        return response
+
+
+class StageProfiler:
+    """
+    Collects profiles of named stages (e.g. fetch, parse, DB write) from any number of threads
+    and dumps one merged profile per stage. Does nothing until enabled.
+    Since python 3.12 only one profiler can be active in a process, so while profiling,
+    stages of different threads run one at a time and a nested stage counts into the outer one.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._profiles: dict[str, list[cProfile.Profile]] = defaultdict(list)
+        self._active = threading.RLock()
+        self._local = threading.local()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def stage(self, name: str) -> ContextManager:
+        if not self.enabled:
+            return nullcontext()
+        return self._profile_stage(name)
+
+    @contextmanager
+    def _profile_stage(self, name: str) -> Iterator[None]:
+        with self._active:
+            if getattr(self._local, "profiling", False):
+                yield
+                return
+            # Before python 3.12 cProfile only sees the thread it was enabled in,
+            # so each call gets its own profile.
+            profile = cProfile.Profile()
+            self._local.profiling = True
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                self._local.profiling = False
+                with self._lock:
+                    self._profiles[name].append(profile)
+
+    def dump(self, directory: Path) -> list[Path]:
+        """
+        Merges collected profiles of every stage and saves them as <stage>.prof files.
+        @param directory: Path, where to save profiles.
+        @return: list of saved files.
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = []
+        with self._lock:
+            for name, profiles in self._profiles.items():
+                stats = pstats.Stats(profiles[0])
+                for profile in profiles[1:]:
+                    stats.add(profile)
+                path = directory / f"{name}.prof"
+                stats.dump_stats(path)
+                paths.append(path)
+            self._profiles.clear()
+        return paths
@@ -0,0 +1,74 @@
+"""
+Planner of search queries.
+
+A query is split into normalized terms, which are ANDed: every term has to match either the name
+of an entity or a name of a related one (an actor of a movie, a movie of an actor),
+so "forman amadeus" finds Amadeus, where Forman plays.
+Cross-entity queries, like "movies with Hanks" or "actors in Amadeus", search a single entity type
+and match the terms against the related entities only.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+# Queries are bounded, so a pasted paragraph can't produce a statement with hundreds of joins.
+MAX_TERMS = 8
+
+TERM_RE = re.compile(r"\w+")
+MOVIES_WITH_RE = re.compile(r"^\W*(?:movies?|films?|filmy?)\s+(?:with|s|se)\b")
+ACTORS_IN_RE = re.compile(r"^\W*(?:actors?|herci|herec)\s+(?:in|v|ve)\b")
+
+
+@dataclass(frozen=True)
+class SearchPlan:
+    # Lowercased terms, the most selective (longest) first.
+    terms: tuple[str, ...]
+    movies: bool = True
+    actors: bool = True
+    # Terms are matched against names of related entities only.
+    related_only: bool = False
+
+    def __bool__(self) -> bool:
+        return bool(self.terms)
+
+
+def tokenize(query: str) -> list[str]:
+    return TERM_RE.findall(query.lower())
+
+
+def plan_query(query: Optional[str]) -> SearchPlan:
+    """
+    @param query: raw search query, already unquoted.
+    @return: plan of the search, which is falsy, if nothing has to be searched.
+    """
+    query = (query or "").lower()
+    movies = actors = True
+    related_only = False
+    for pattern in (MOVIES_WITH_RE, ACTORS_IN_RE):
+        rest = pattern.sub("", query, count=1)
+        # "movies with" alone is a search for a movie named so.
+        if rest != query and tokenize(rest):
+            query = rest
+            movies, actors = pattern is MOVIES_WITH_RE, pattern is ACTORS_IN_RE
+            related_only = True
+            break
+    return SearchPlan(
+        terms=prune_terms(tokenize(query)),
+        movies=movies,
+        actors=actors,
+        related_only=related_only,
+    )
+
+
+def prune_terms(terms: list[str]) -> tuple[str, ...]:
+    """
+    Drops duplicate terms and terms, which are contained in other ones:
+    any name matching "tomas" matches "tom" as well, so "tom" adds nothing but work.
+    @return: remaining terms, longest first.
+    """
+    pruned: list[str] = []
+    for term in sorted(set(terms), key=lambda term: (-len(term), term)):
+        if not any(term in longer for longer in pruned):
+            pruned.append(term)
+    return tuple(pruned[:MAX_TERMS])
@@ -1,11 +1,15 @@
 from dataclasses import dataclass
-from typing import Optional, Type, TypeVar
+from typing import Iterable, Optional, Type, TypeVar
 from urllib.parse import unquote_plus
 
-from django.db import transaction
-from django.db.models import Model, ObjectDoesNotExist, QuerySet
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Model, Q, QuerySet
 from django.http import Http404
 
+from core.db.functions import UnicodeLower
+
+from . import query_planner, slug_cache, snapshot
 from .models import Actor, Movie
 
 
@@ -36,33 +40,162 @@ def clean_db() -> None:
     Movie.objects.all().delete()
 
 
-@transaction.atomic
-def create_movie_with_actors(movie_dto: MovieDTO) -> None:
+def actors_for_write() -> QuerySet:
+    """
+    Actors read from the write connection, which sees data of the current transaction.
+    """
+    return Actor.objects.using(router.db_for_write(Actor))
+
+
+class ActorIdentityMap:
+    """
+    Maps CSFD ids of actors to their primary keys during a single parsing run,
+    so every actor is looked up in the DB (or created) only once per run,
+    no matter in how many movies it appears.
+    """
+
+    def __init__(self, pks_by_csfd_id: Optional[dict[int, int]] = None):
+        self._pks_by_csfd_id = pks_by_csfd_id or {}
+
+    @classmethod
+    def from_db(cls) -> "ActorIdentityMap":
+        """
+        Pre-warms the map with all existing actors in a single query.
+        """
+        return cls(dict(actors_for_write().values_list("csfd_id", "pk")))
+
+    def __len__(self) -> int:
+        return len(self._pks_by_csfd_id)
+
+    def get(self, csfd_id: int) -> Optional[int]:
+        return self._pks_by_csfd_id.get(csfd_id)
+
+    def update(self, pks_by_csfd_id: dict[int, int]) -> None:
+        self._pks_by_csfd_id.update(pks_by_csfd_id)
+
+
+def create_movie_with_actors(
+    movie_dto: MovieDTO, identity_map: Optional[ActorIdentityMap] = None
+) -> None:
     """
     Creates a movie with provided name.
     Creates or fetches (if exist) actors with provided names,
     assigns those actors to the created movie.
+    @param identity_map: Optional[ActorIdentityMap], actors known in the current run,
+        if not provided, actors of the movie are fetched by a single query.
+    """
+    csfd_ids = {int(actor.csfd_id): actor.name for actor in movie_dto.actors}
+    if identity_map is None:
+        identity_map = ActorIdentityMap(
+            dict(actors_for_write().filter(csfd_id__in=csfd_ids).values_list("csfd_id", "pk"))
+        )
+
+    created_pks: dict[int, int] = {}
+    with transaction.atomic():
+        actor_pks = []
+        for csfd_id, name in csfd_ids.items():
+            pk = identity_map.get(csfd_id)
+            if pk is None:
+                pk = created_pks[csfd_id] = Actor.objects.create(name=name, csfd_id=csfd_id).pk
+            actor_pks.append(pk)
+        movie = Movie.objects.create(name=movie_dto.name)
+        movie.actors.add(*actor_pks)
+    # Only after the transaction succeeded, otherwise the map could point to rolled back actors.
+    identity_map.update(created_pks)
+
+
+# Fields rendered on the search page, the rest of them is deferred.
+SEARCH_FIELDS = ["id", "name", "slug"]
+
+
+def get_movies_and_actors_by_query(
+    query: Optional[str], limit: Optional[int] = None
+) -> tuple[list[Movie], list[Actor]]:
+    """
+    Searches through movies and actors to find occurrences of those models by provided query,
+    see query_planner for how the query is interpreted. Both are fetched by a single statement.
+    @param limit: max count of movies and (separately) actors, SEARCH_RESULTS_LIMIT by default.
+    @return: tuple, first argument is movies list, second - actors list, both ordered by slug.
+    """
+    plan = query_planner.plan_query(unquote_plus(query) if query else None)
+    if not plan:
+        return [], []
+    limit = settings.SEARCH_RESULTS_LIMIT if limit is None else limit
+
+    searched: list[QuerySet] = []
+    if plan.movies:
+        searched.append(
+            Movie.objects.filter(
+                *(term_filter("actor", term, plan.related_only) for term in plan.terms)
+            )
+        )
+    if plan.actors:
+        searched.append(
+            Actor.objects.filter(
+                *(term_filter("movie", term, plan.related_only) for term in plan.terms)
+            )
+        )
+
+    using = router.db_for_read(Movie)
+    selects, params = [], []
+    for kind, queryset in enumerate(searched):
+        queryset = queryset.order_by("slug").values_list(*SEARCH_FIELDS)[:limit]
+        sql, queryset_params = queryset.query.get_compiler(using).as_sql()
+        # Sqlite does not allow LIMIT in parts of a compound statement, but does in subqueries.
+        selects.append(f"SELECT {kind}, * FROM ({sql})")
+        params.extend(queryset_params)
+
+    # Order of rows of a compound statement is only defined by its own ORDER BY:
+    # by kind, then by slug (the first column is the kind).
+    order_by = f" ORDER BY 1, {SEARCH_FIELDS.index('slug') + 2}"
+    results: dict[Type[Model], list] = {Movie: [], Actor: []}
+    with connections[using].cursor() as cursor:
+        cursor.execute(" UNION ALL ".join(selects) + order_by, params)
+        for kind, *values in cursor.fetchall():
+            model = searched[kind].model
+            results[model].append(model.from_db(using, SEARCH_FIELDS, values))
+    return results[Movie], results[Actor]
+
+
+def term_filter(related: str, term: str, related_only: bool = False) -> Q:
+    """
+    Matches movies or actors, whose name or a name of a related entity contains the term.
+    Related entities are found by a join through the movie-actor table in a subquery,
+    which sqlite evaluates once per term, not once per row.
+    @param related: "actor" to filter movies, "movie" to filter actors.
+    @param related_only: match names of related entities only.
+    """
+    lookup = name_lookup(term)
+    matching_related = Movie.actors.through.objects.filter(**{f"{related}__{lookup}": term})
+    other = "movie_id" if related == "actor" else "actor_id"
+    condition = Q(pk__in=matching_related.values(other))
+    if related_only:
+        return condition
+    return Q(**{lookup: term}) | condition
+
+
+def name_lookup(term: str) -> str:
+    """
+    Sqlite LIKE folds ASCII letters only, so names are lowercased by a python function
+    for terms with other letters ("šťastný" has to match "Šťastný"), the same way
+    as the snapshot does it. That function is called for every scanned row and costs
+    a call into python each time (scans about 3x slower than LIKE), so ASCII terms keep
+    the builtin icontains.
+    @param term: lowercased term.
     """
-    actors = [
-        Actor.objects.get_or_create(name=actor.name, csfd_id=actor.csfd_id)[0]
-        for actor in movie_dto.actors
-    ]
-    movie = Movie.objects.create(name=movie_dto.name)
-    movie.actors.add(*actors)
+    return "name__icontains" if term.isascii() else f"name__{UnicodeLower.lookup_name}__contains"
 
 
-def get_movies_and_actors_by_query(query: Optional[str]) -> tuple[QuerySet, QuerySet]:
+def search_movies_and_actors(query: Optional[str]) -> tuple[Iterable, Iterable]:
     """
-    Searches through movies and actors to find occurrences of those models by provided query.
-    @return: tuple, first argument is movies queryset, second - actors queryset.
+    Same as get_movies_and_actors_by_query, but served from the dataset snapshot if it exists.
+    @return: tuple, first argument is movies, second - actors,
+        either model lists or snapshot record lists.
     """
-    if query:
-        query = unquote_plus(query)
-        movies = Movie.objects.filter(name__icontains=query)
-        actors = Actor.objects.filter(name__icontains=query)
-    else:
-        movies, actors = Movie.objects.none(), Actor.objects.none()
-    return movies, actors
+    dataset = snapshot.get_snapshot()
+    if dataset is None or not query:
+        return get_movies_and_actors_by_query(query)
+    return dataset.search(unquote_plus(query), settings.SEARCH_RESULTS_LIMIT)
 
 
 TModel = TypeVar("TModel", bound=Model)
@@ -76,10 +209,10 @@ def get_entity_by_slug(model: Type[TModel], slug) -> TModel:
     @return: found instance.
     @raise: Http404, if no instance was found.
     """
-    try:
-        return model.objects.get(slug=slug)  # type: ignore
-    except ObjectDoesNotExist:
+    instance = slug_cache.resolve(model, slug)
+    if instance is None:
         raise Http404(f"No {model.__name__} matches the given slug.")
+    return instance  # type: ignore
 
 
 def get_actor_by_slug(slug: str) -> Actor:
@@ -0,0 +1,257 @@
+"""
+In-process resolution of detail page slugs.
+
+Existing movies and actors are kept in a bounded LRU cache along with their related entities,
+so popular detail pages are rendered without any query. Slugs, which are not in the dataset
+(stale links, bots), are rejected by a Bloom filter of all known slugs without touching the DB.
+Both are rebuilt, when the dataset version changes (see warmup.dataset_version).
+"""
+
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Iterable, Optional, Type
+
+from django.conf import settings
+from django.db import router
+from django.db.models import Model, ObjectDoesNotExist
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+
+from . import warmup
+from .models import Actor, Movie, entity_deleted
+
+# Small datasets (and tests) get a filter, whose false positive rate is far below error_rate.
+MIN_FILTER_BITS = 1 << 13
+
+
+class BloomFilter:
+    """
+    Set of strings without false negatives and with false positives at about error_rate,
+    which takes about 10 bits per item at 1% error rate.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        optimal_size = -capacity * math.log(error_rate) / math.log(2) ** 2
+        self.num_hashes = max(1, round(optimal_size / capacity * math.log(2)))
+        # Power of two, so any odd step of double hashing visits distinct positions.
+        self.size = max(MIN_FILTER_BITS, 1 << math.ceil(math.log2(optimal_size)))
+        self.bits = bytearray(self.size // 8)
+
+    @classmethod
+    def from_items(cls, items: Iterable[str], capacity: int, error_rate: float) -> "BloomFilter":
+        bloom_filter = cls(capacity, error_rate)
+        for item in items:
+            bloom_filter.add(item)
+        return bloom_filter
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # Double hashing: k positions are derived from two halves of a single digest.
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + number * second) % self.size for number in range(self.num_hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item)
+        )
+
+
+class LRUCache:
+    """
+    Thread-safe dict of at most maxsize items, least recently used ones are evicted first.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._items: OrderedDict[str, Any] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+# Fields of cached entities and their related ones, which detail templates render.
+CACHED_FIELDS = ("id", "name", "slug")
+
+# (id, name, slug) of an entity and of its related entities.
+Row = tuple[Any, ...]
+CachedEntity = tuple[Row, tuple[Row, ...]]
+
+
+class SlugResolver:
+    """
+    Resolves slugs of a single model into instances with prefetched related entities,
+    which detail templates render.
+    Cached entities are kept as plain tuples, which take a fraction of memory of model instances,
+    and every request gets its own instances built from them.
+    """
+
+    def __init__(self, model: Type[Model], related: str):
+        self.model = model
+        self.related = related
+        self._lock = threading.Lock()
+        self._counters_lock = threading.Lock()
+        self._version: Optional[tuple] = None
+        self._cache = LRUCache(0)
+        self._filter: Optional[BloomFilter] = None
+        self.reset_counters()
+
+    def reset_counters(self) -> None:
+        # Served from the cache / loaded from the DB / rejected by the filter /
+        # passed the filter, but not found in the DB.
+        with self._counters_lock:
+            self.hits = self.misses = self.rejected = self.false_positives = 0
+
+    def _count(self, counter: str) -> None:
+        with self._counters_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def invalidate(self) -> None:
+        """
+        Cache and filter are rebuilt on the next lookup.
+        """
+        self._version = None
+
+    def rebuild(self, version: Optional[tuple] = None) -> None:
+        """
+        Builds the filter from all slugs of the current dataset and empties the cache.
+        @param version: dataset version, which was found stale, the filter is only built
+            by the first of threads, which found it, the rest of them just wait for it.
+        """
+        version = warmup.dataset_version() if version is None else version
+        with self._lock:
+            if self._version == version and self._filter is not None:
+                return
+            slugs = self.model.objects.values_list("slug", flat=True)
+            # Streamed, so slugs of the whole dataset are never held in memory at once.
+            self._filter = BloomFilter.from_items(
+                slugs.iterator(), slugs.count(), settings.SLUG_FILTER_ERROR_RATE
+            )
+            self._cache = LRUCache(settings.SLUG_CACHE_SIZE)
+            self._version = version
+
+    def resolve(self, slug: str) -> Optional[Model]:
+        """
+        @return: instance with provided slug, None if there is no such.
+        """
+        version = warmup.dataset_version()
+        if self._version != version:
+            self.rebuild(version)
+        cached = self._cache.get(slug)
+        if cached is not None:
+            self._count("hits")
+            return self.build(cached)
+        assert self._filter is not None
+        if slug not in self._filter:
+            self._count("rejected")
+            return None
+        self._count("misses")
+        cached = self.load(slug)
+        if cached is None:
+            self._count("false_positives")
+            return None
+        self._cache.put(slug, cached)
+        return self.build(cached)
+
+    def load(self, slug: str) -> Optional[CachedEntity]:
+        """
+        @return: rows of the entity with provided slug and of its related entities,
+            None if there is no such.
+        """
+        try:
+            row = self.model.objects.values_list(*CACHED_FIELDS).get(slug=slug)
+        except ObjectDoesNotExist:
+            return None
+        instance = self.model.from_db(router.db_for_read(self.model), CACHED_FIELDS, row)
+        related_rows = getattr(instance, self.related).values_list(*CACHED_FIELDS)
+        return row, tuple(related_rows)
+
+    def build(self, cached: CachedEntity) -> Model:
+        """
+        @return: new instance with its related entities prefetched, the same way
+            as prefetch_related would do it.
+        """
+        row, related_rows = cached
+        using = router.db_for_read(self.model)
+        instance = self.model.from_db(using, CACHED_FIELDS, row)
+        related = getattr(instance, self.related).all()
+        related._result_cache = [
+            related.model.from_db(using, CACHED_FIELDS, related_row) for related_row in related_rows
+        ]
+        related._prefetch_done = True
+        instance._prefetched_objects_cache = {self.related: related}  # type: ignore
+        return instance
+
+    def stats(self) -> dict[str, int]:
+        with self._counters_lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "rejected": self.rejected,
+                "false_positives": self.false_positives,
+                "cached": len(self._cache),
+            }
+
+
+resolvers = {Movie: SlugResolver(Movie, "actors"), Actor: SlugResolver(Actor, "movies")}
+
+
+def resolve(model: Type[Model], slug: str) -> Optional[Model]:
+    return resolvers[model].resolve(slug)
+
+
+def stats() -> dict[str, dict[str, int]]:
+    return {model.__name__: resolver.stats() for model, resolver in resolvers.items()}
+
+
+def reset() -> None:
+    for resolver in resolvers.values():
+        resolver.invalidate()
+        resolver.reset_counters()
+
+
+@receiver(warmup.warming_up)
+def build_before_fork(**kwargs) -> None:
+    for resolver in resolvers.values():
+        resolver.rebuild()
+
+
+@receiver(warmup.dataset_changed)
+def invalidate(**kwargs) -> None:
+    for resolver in resolvers.values():
+        resolver.invalidate()
+
+
+# Single writes (e.g. through the admin or the shell) are seen by this process at once,
+# other processes see them, once the command, which made them, bumps the dataset version.
+@receiver(post_save, sender=Movie)
+@receiver(post_save, sender=Actor)
+@receiver(m2m_changed, sender=Movie.actors.through)
+@receiver(entity_deleted, sender=Movie)
+@receiver(entity_deleted, sender=Actor)
+def on_model_changed(**kwargs) -> None:
+    invalidate()
@@ -0,0 +1,392 @@
+"""
+Compact read-only binary snapshot of the dataset, served without the ORM.
+
+The file is memory-mapped, so all worker processes share its pages through the OS page cache.
+Movies and actors are stored as tables of records sorted by slug, each table consists of
+u32 arrays and blobs (names, slugs, lowercased names for search, adjacency lists),
+addressed by a table of contents in the header.
+"""
+
+import bisect
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Iterator, Optional, Sequence
+
+from django.conf import settings
+
+from .models import Actor, Movie
+from .query_planner import SearchPlan, plan_query
+
+logger = logging.getLogger("searcher.snapshot")
+
+MAGIC = b"CSFDSNP1"
+BYTE_ORDER_MARK = 0x01020304
+# Separates records in the search blob, so a query can never match across two names.
+SEARCH_SEPARATOR = b"\0"
+
+SECTIONS = ("name_offsets", "names", "slug_offsets", "slugs", "search_offsets", "search")
+SECTIONS += ("related_offsets", "related")
+TABLES = ("movies", "actors")
+
+# magic, byte order mark, dataset version, then offset and length of every section of every table.
+HEADER = struct.Struct(f"=8sIQ{len(TABLES) * len(SECTIONS) * 2}Q")
+ALIGNMENT = 8
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class Table:
+    """
+    One entity type (movies or actors) of a snapshot.
+    Records are addressed by their index, which is also their position in slug order.
+    """
+
+    def __init__(self, buffer: mmap.mmap, sections: dict[str, tuple[int, int]]):
+        self._buffer = buffer
+        view = memoryview(buffer)
+        self.name_offsets = self._u32(view, sections["name_offsets"])
+        self.slug_offsets = self._u32(view, sections["slug_offsets"])
+        self.search_offsets = self._u32(view, sections["search_offsets"])
+        self.related_offsets = self._u32(view, sections["related_offsets"])
+        self.related_indices = self._u32(view, sections["related"])
+        self._names_start = sections["names"][0]
+        self._slugs_start = sections["slugs"][0]
+        self._search_start, search_length = sections["search"]
+        self._search_end = self._search_start + search_length
+        # Filled by Snapshot: table of entities, which related indices point to,
+        # and a class of records of this table.
+        self.related_table: Optional["Table"] = None
+        self.record_class: type[Record] = Record
+
+    @staticmethod
+    def _u32(view: memoryview, section: tuple[int, int]) -> memoryview:
+        start, length = section
+        end = start + length
+        return view[start:end].cast("I")
+
+    def __len__(self) -> int:
+        return len(self.name_offsets) - 1
+
+    def _blob_item(self, blob_start: int, offsets: memoryview, index: int) -> bytes:
+        start, end = blob_start + offsets[index], blob_start + offsets[index + 1]
+        return self._buffer[start:end]
+
+    def name(self, index: int) -> str:
+        return self._blob_item(self._names_start, self.name_offsets, index).decode("utf-8")
+
+    def slug(self, index: int) -> str:
+        return self._slug_bytes(index).decode("ascii")
+
+    def _slug_bytes(self, index: int) -> bytes:
+        return self._blob_item(self._slugs_start, self.slug_offsets, index)
+
+    def find_slug(self, slug: str) -> Optional[int]:
+        """
+        Binary search over slugs.
+        @return: index of a record with provided slug, None if there is no such.
+        """
+        try:
+            target = slug.encode("ascii")
+        except UnicodeEncodeError:
+            return None
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self._slug_bytes(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self) and self._slug_bytes(low) == target:
+            return low
+        return None
+
+    def search(self, query: str) -> list[int]:
+        """
+        Case-insensitive substring search in names.
+        @return: indices of matching records in slug order.
+        """
+        needle = query.lower().encode("utf-8")
+        if not needle or SEARCH_SEPARATOR in needle:
+            return []
+        found = []
+        position = self._search_start
+        while True:
+            position = self._buffer.find(needle, position, self._search_end)
+            if position == -1:
+                return found
+            index = bisect.bisect_right(self.search_offsets, position - self._search_start) - 1
+            found.append(index)
+            # Skip the rest of the matched name, every record is reported once.
+            position = self._search_start + self.search_offsets[index + 1]
+
+    def match(self, plan: SearchPlan, limit: Optional[int] = None) -> list[int]:
+        """
+        Same semantics as the ORM search of services.get_movies_and_actors_by_query:
+        every term has to be found in the name of a record or a name of a related one.
+        @return: indices of matching records in slug order.
+        """
+        assert self.related_table is not None
+        matching: Optional[set[int]] = None
+        for term in plan.terms:
+            found = set()
+            for related_index in self.related_table.search(term):
+                found.update(self.related_table.related(related_index))
+            if not plan.related_only:
+                found.update(self.search(term))
+            matching = found if matching is None else matching & found
+            if not matching:
+                return []
+        return sorted(matching or ())[:limit]
+
+    def related(self, index: int) -> memoryview:
+        start, end = self.related_offsets[index], self.related_offsets[index + 1]
+        return self.related_indices[start:end]
+
+
+class Record:
+    """
+    Single movie or actor, mimics attributes of a model instance used in templates.
+    """
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: Table, index: int):
+        self.table = table
+        self.index = index
+
+    @property
+    def name(self) -> str:
+        return self.table.name(self.index)
+
+    @property
+    def slug(self) -> str:
+        return self.table.slug(self.index)
+
+    def _related(self) -> "RecordList":
+        assert self.table.related_table is not None
+        return RecordList(self.table.related_table, self.table.related(self.index))
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Record) and self.table is other.table and self.index == other.index
+
+    def __hash__(self) -> int:
+        return hash((id(self.table), self.index))
+
+
+class MovieRecord(Record):
+    __slots__ = ()
+
+    @property
+    def actors(self) -> "RecordList":
+        return self._related()
+
+
+class ActorRecord(Record):
+    __slots__ = ()
+
+    @property
+    def movies(self) -> "RecordList":
+        return self._related()
+
+
+class RecordList:
+    """
+    Lazy list of records, quacks like a queryset for templates.
+    Records are only created while iterating.
+    """
+
+    def __init__(self, table: Table, indices: Sequence[int]):
+        self.table = table
+        self.indices = indices
+
+    def all(self) -> "RecordList":
+        return self
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __iter__(self) -> Iterator[Record]:
+        record_class = self.table.record_class
+        return (record_class(self.table, index) for index in self.indices)
+
+
+class Snapshot:
+    """
+    Memory-mapped snapshot file.
+    """
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            # Of the file actually mapped, the path may be replaced by a new snapshot meanwhile.
+            stat = os.fstat(f.fileno())
+            self.stat = (stat.st_ino, stat.st_mtime_ns)
+            if not stat.st_size:
+                raise SnapshotError(f"{path} is empty")
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._buffer) < HEADER.size:
+            raise SnapshotError(f"{path} is too short to be a snapshot")
+        magic, byte_order_mark, self.version, *toc = HEADER.unpack_from(self._buffer)
+        if magic != MAGIC or byte_order_mark != BYTE_ORDER_MARK:
+            raise SnapshotError(f"{path} is not a snapshot or was built on another platform")
+
+        tables = {}
+        for table_number, table_name in enumerate(TABLES):
+            sections = {}
+            for section_number, section in enumerate(SECTIONS):
+                position = (table_number * len(SECTIONS) + section_number) * 2
+                start, length = toc[position], toc[position + 1]
+                if start + length > len(self._buffer):
+                    raise SnapshotError(f"{path} is truncated")
+                sections[section] = (start, length)
+            tables[table_name] = Table(self._buffer, sections)
+        self.movies, self.actors = tables["movies"], tables["actors"]
+        self.movies.related_table, self.actors.related_table = self.actors, self.movies
+        self.movies.record_class, self.actors.record_class = MovieRecord, ActorRecord
+
+    def preload(self) -> None:
+        """
+        Asks the kernel to read the whole file into the page cache ahead of the first requests.
+        """
+        if hasattr(mmap, "MADV_WILLNEED"):
+            self._buffer.madvise(mmap.MADV_WILLNEED)
+
+    def get_by_slug(self, table: Table, slug: str) -> Optional[Record]:
+        index = table.find_slug(slug)
+        return None if index is None else table.record_class(table, index)
+
+    def search(self, query: str, limit: Optional[int] = None) -> tuple[RecordList, RecordList]:
+        """
+        @param limit: max count of movies and (separately) actors.
+        """
+        plan = plan_query(query)
+        return (
+            RecordList(self.movies, self.movies.match(plan, limit) if plan.movies else []),
+            RecordList(self.actors, self.actors.match(plan, limit) if plan.actors else []),
+        )
+
+
+def build_snapshot(path: Path) -> None:
+    """
+    Builds a snapshot of current movies and actors in the DB.
+    File is written next to the target and atomically moved over it,
+    so workers, which still map the previous snapshot, are not affected.
+    """
+    movies = sorted(Movie.objects.values_list("id", "name", "slug"), key=lambda row: row[2])
+    actors = sorted(Actor.objects.values_list("id", "name", "slug"), key=lambda row: row[2])
+    movie_indices = {pk: index for index, (pk, _, _) in enumerate(movies)}
+    actor_indices = {pk: index for index, (pk, _, _) in enumerate(actors)}
+
+    movie_actors: list[list[int]] = [[] for _ in movies]
+    actor_movies: list[list[int]] = [[] for _ in actors]
+    for movie_id, actor_id in Movie.actors.through.objects.values_list("movie_id", "actor_id"):
+        movie_index, actor_index = movie_indices[movie_id], actor_indices[actor_id]
+        movie_actors[movie_index].append(actor_index)
+        actor_movies[actor_index].append(movie_index)
+
+    sections = [
+        *table_sections(
+            [name for _, name, _ in movies], [slug for *_, slug in movies], movie_actors
+        ),
+        *table_sections(
+            [name for _, name, _ in actors], [slug for *_, slug in actors], actor_movies
+        ),
+    ]
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(b"\0" * HEADER.size)
+        toc = []
+        for section in sections:
+            f.write(b"\0" * (-f.tell() % ALIGNMENT))
+            toc += [f.tell(), len(section)]
+            f.write(section)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, BYTE_ORDER_MARK, time.time_ns(), *toc))
+    os.replace(tmp_path, path)
+
+
+def table_sections(names: list[str], slugs: list[str], related: list[list[int]]) -> list[bytes]:
+    """
+    @return: sections of a single table in SECTIONS order.
+    """
+    encoded_names = [name.encode("utf-8") for name in names]
+    encoded_search = [name.lower().encode("utf-8") + SEARCH_SEPARATOR for name in names]
+    encoded_slugs = [slug.encode("ascii") for slug in slugs]
+    related_indices = array("I")
+    for indices in related:
+        related_indices.extend(sorted(indices))
+    return [
+        u32_offsets(encoded_names),
+        b"".join(encoded_names),
+        u32_offsets(encoded_slugs),
+        b"".join(encoded_slugs),
+        u32_offsets(encoded_search),
+        b"".join(encoded_search),
+        u32_offsets(related),
+        related_indices.tobytes(),
+    ]
+
+
+def u32_offsets(items: Sequence[Sequence]) -> bytes:
+    offsets = array("I", [0])
+    total = 0
+    for item in items:
+        total += len(item)
+        offsets.append(total)
+    return offsets.tobytes()
+
+
+_lock = threading.Lock()
+_loaded: Optional[Snapshot] = None
+_loaded_stat: Optional[tuple[int, int]] = None
+_checked_at = float("-inf")
+
+
+def get_snapshot() -> Optional[Snapshot]:
+    """
+    Snapshot to serve from, None if it is disabled, does not exist or is broken,
+    so the ORM should be used.
+    The file is checked for replacement at most once per SNAPSHOT_CHECK_INTERVAL seconds
+    and remapped, if it was rebuilt.
+    """
+    global _loaded, _loaded_stat, _checked_at
+    if not settings.SNAPSHOT_ENABLED:
+        return None
+    now = time.monotonic()
+    if now - _checked_at < settings.SNAPSHOT_CHECK_INTERVAL:
+        return _loaded
+    with _lock:
+        _checked_at = now
+        try:
+            stat = os.stat(settings.SNAPSHOT_PATH)
+        except FileNotFoundError:
+            _loaded, _loaded_stat = None, None
+            return None
+        if (stat.st_ino, stat.st_mtime_ns) != _loaded_stat:
+            try:
+                _loaded = Snapshot(settings.SNAPSHOT_PATH)
+            except (SnapshotError, OSError, struct.error) as error:
+                # Served by the ORM, until the file is replaced by a valid one.
+                logger.error("Snapshot %s can't be loaded: %s", settings.SNAPSHOT_PATH, error)
+                _loaded, _loaded_stat = None, (stat.st_ino, stat.st_mtime_ns)
+            else:
+                _loaded_stat = _loaded.stat
+    return _loaded
+
+
+def reset() -> None:
+    """
+    Forgets loaded snapshot, so it is loaded again on next get_snapshot call.
+    """
+    global _loaded, _loaded_stat, _checked_at
+    with _lock:
+        _loaded, _loaded_stat, _checked_at = None, None, float("-inf")
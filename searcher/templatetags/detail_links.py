@@ -0,0 +1,46 @@
+"""
+Fast rendering of long lists of links to detail pages.
+
+{% url %} goes through the URL resolver for every row, which dominates rendering of large lists,
+so the URL is reversed once per pattern and rows are built as plain strings.
+Slugs are validated by SlugField, so, unlike other arguments of {% url %}, need no quoting.
+"""
+
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from django import template
+from django.conf import settings
+from django.urls import get_script_prefix, get_urlconf, reverse
+from django.utils.html import conditional_escape
+from django.utils.safestring import SafeString, mark_safe
+
+register = template.Library()
+
+SLUG_PLACEHOLDER = "slug-placeholder"
+
+
+@lru_cache(maxsize=None)
+def url_parts(url_name: str, script_prefix: str, urlconf: Optional[str]) -> tuple[str, str]:
+    """
+    @return: parts of the URL of the pattern before and after the slug.
+    """
+    url = reverse(url_name, args=[SLUG_PLACEHOLDER], urlconf=urlconf)
+    prefix, suffix = url.rsplit(SLUG_PLACEHOLDER, 1)
+    return prefix, suffix
+
+
+@register.simple_tag
+def detail_links(entities: Iterable, url_name: str) -> SafeString:
+    """
+    Same as {% for entity in entities %}
+        <li><a href="{% url url_name entity.slug %}">{{ entity.name }}</a></li>
+    {% endfor %}, but without resolving the URL for every entity.
+    """
+    # reverse() depends on both, they are set per request (thread).
+    prefix, suffix = url_parts(url_name, get_script_prefix(), get_urlconf(settings.ROOT_URLCONF))
+    rows = (
+        f'<li><a href="{prefix}{entity.slug}{suffix}">{conditional_escape(entity.name)}</a></li>'
+        for entity in entities
+    )
+    return mark_safe("\n".join(rows))
@@ -0,0 +1,91 @@
+from http import HTTPStatus
+from pathlib import Path
+from typing import Type
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connections
+from django.http import Http404
+from django.test import AsyncClient, AsyncRequestFactory, RequestFactory
+from django.urls import reverse
+
+from searcher import async_views, instrumentation, snapshot
+
+from .factories import ActorFactory, MovieFactory
+
+# Async views may query the DB from another thread, which only sees committed data.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+request_factory = AsyncRequestFactory()
+
+
+def test_async_search(actor_factory: Type[ActorFactory], movie_factory: Type[MovieFactory]):
+    first_actor = actor_factory(name="first actor")
+    actor_factory(name="second actor")
+    first_movie = movie_factory(name="first movie")
+
+    response = async_to_sync(async_views.search)(request_factory.get("/?q=first"))
+    assert response.status_code == HTTPStatus.OK
+    content = response.content.decode()
+    assert reverse("actor-detail", args=[first_actor.slug]) in content
+    assert reverse("movie-detail", args=[first_movie.slug]) in content
+    assert "second actor" not in content
+
+    response = async_to_sync(async_views.search)(request_factory.get("/?q=nothing"))
+    assert "No movies were found." in response.content.decode()
+
+    response = async_to_sync(async_views.search)(request_factory.get("/"))
+    assert "Found results" not in response.content.decode()
+
+
+def test_async_post_search():
+    request = RequestFactory().post("/", data={"search_input": "some"})
+    response = async_to_sync(async_views.search)(request)
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.url == reverse("search") + "?q=some"
+
+
+def test_async_detail(actor_factory: Type[ActorFactory], movie_factory: Type[MovieFactory]):
+    actors = actor_factory.create_batch(3)
+    movie = movie_factory()
+    movie.actors.add(*actors)
+
+    response = async_to_sync(async_views.movie)(request_factory.get("/"), slug=movie.slug)
+    assert response.status_code == HTTPStatus.OK
+    for actor in actors:
+        assert reverse("actor-detail", args=[actor.slug]) in response.content.decode()
+
+    response = async_to_sync(async_views.actor)(request_factory.get("/"), slug=actors[0].slug)
+    assert reverse("movie-detail", args=[movie.slug]) in response.content.decode()
+
+    with pytest.raises(Http404):
+        async_to_sync(async_views.actor)(request_factory.get("/"), slug="some-random-slug")
+
+
+def test_async_detail_from_snapshot(
+    settings, tmp_path: Path, actor_factory: Type[ActorFactory], movie_factory: Type[MovieFactory]
+):
+    actor = actor_factory(name="Snapshot Actor")
+    movie = movie_factory()
+    movie.actors.add(actor)
+    settings.SNAPSHOT_ENABLED = True
+    settings.SNAPSHOT_PATH = tmp_path / "snapshot.bin"
+    snapshot.reset()
+    snapshot.build_snapshot(settings.SNAPSHOT_PATH)
+
+    response = async_to_sync(async_views.movie)(request_factory.get("/"), slug=movie.slug)
+    assert "Snapshot Actor" in response.content.decode()
+    with pytest.raises(Http404):
+        async_to_sync(async_views.movie)(request_factory.get("/"), slug="some-random-slug")
+    snapshot.reset()
+
+
+def test_async_middleware_chain(actor_factory: Type[ActorFactory]):
+    actor_factory(name="first actor")
+    # Sync code runs in this thread. In a real server its connections are opened after
+    # the middleware is loaded and get the SQL wrapper then, the in-memory test DB
+    # connection can't be reopened though.
+    instrumentation.install_sql_wrapper(connections["default"])
+    response = async_to_sync(AsyncClient().get)(reverse("search") + "?q=first")
+    assert response.status_code == HTTPStatus.OK
+    assert 'db;desc="1 queries"' in response["Server-Timing"]
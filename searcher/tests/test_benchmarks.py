@@ -0,0 +1,60 @@
+import random
+
+import pytest
+from django.core.management import call_command
+from django.utils.text import slugify
+
+from searcher import benchmarks, models, snapshot
+from searcher.management.commands.generate_dataset import ActorPopularity
+
+
+def test_percentile():
+    values = [float(i) for i in range(100, 0, -1)]
+    assert benchmarks.percentile(values, 0.5) == 51
+    assert benchmarks.percentile(values, 0.99) == 100
+    assert benchmarks.percentile([], 0.5) == 0
+
+
+def test_compare_results():
+    baseline = {
+        "fast": {"p50_ms": 10, "p99_ms": 20},
+        "slow": {"p50_ms": 10, "p99_ms": 20},
+    }
+    results = {
+        "fast": {"p50_ms": 9, "p99_ms": 21},
+        "slow": {"p50_ms": 10, "p99_ms": 30},
+        "new": {"p50_ms": 1, "p99_ms": 1},
+    }
+    report, regressions = benchmarks.compare_results(results, baseline, threshold=0.1)
+    assert regressions == ["slow"]
+    assert report[-1] == "new: no baseline"
+
+
+def test_actor_popularity_is_skewed():
+    popularity = ActorPopularity(first_id=100, num_actors=1000, exponent=0.6, rng=random.Random(0))
+    samples = [popularity.sample() for _ in range(10000)]
+    assert all(100 <= sample < 1100 for sample in samples)
+    counts = sorted((samples.count(i) for i in set(samples)), reverse=True)
+    assert counts[0] > 10 * counts[len(counts) // 2]
+
+
+@pytest.mark.django_db
+def test_generate_dataset(settings):
+    call_command("generate_dataset", actors=50, movies=10, cast_size=6, batch_size=20)
+    assert models.Actor.objects.count() == 50
+    assert models.Movie.objects.count() == 10
+    for model in (models.Actor, models.Movie):
+        for instance in model.objects.all():
+            assert instance.slug == slugify(f"{instance.pk} {instance.name}")
+    assert len(set(models.Actor.objects.values_list("csfd_id", flat=True))) == 50
+    for movie in models.Movie.objects.all():
+        assert 1 <= movie.actors.count() <= 10
+
+    # Appends to existing data
+    call_command("generate_dataset", actors=5, movies=1)
+    assert models.Actor.objects.count() == 55
+    call_command("generate_dataset", actors=5, movies=1, clean=True)
+    assert models.Actor.objects.count() == 5
+    # Snapshot is rebuilt, so the previous dataset is not served from it.
+    dataset = snapshot.Snapshot(settings.SNAPSHOT_PATH)
+    assert len(dataset.actors) == 5 and len(dataset.movies) == 1
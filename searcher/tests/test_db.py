@@ -0,0 +1,93 @@
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from core.db.base import apply_pragmas, is_read_only_uri
+from core.db.routers import READ_DB_ALIAS, WRITE_DB_ALIAS, ReadOnlyReplicaRouter
+from searcher import services
+from searcher.models import Actor
+
+PRAGMAS = {"journal_mode": "WAL", "synchronous": "NORMAL", "cache_size": -2000}
+
+
+def test_apply_pragmas(tmp_path: Path):
+    conn = sqlite3.connect(tmp_path / "db.sqlite3")
+    apply_pragmas(conn, PRAGMAS, read_only=False)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == -2000
+
+
+def test_apply_pragmas_read_only(tmp_path: Path):
+    # Characters, which have a meaning in URIs, are percent-encoded.
+    db_path = tmp_path / "my db?#.sqlite3"
+    sqlite3.connect(db_path).execute("CREATE TABLE t (id integer)")
+
+    conn = sqlite3.connect(f"{db_path.as_uri()}?mode=ro", uri=True)
+    # Would fail with "attempt to write a readonly database" if journal_mode was applied.
+    apply_pragmas(conn, PRAGMAS, read_only=True)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute("INSERT INTO t VALUES (1)")
+
+
+@pytest.mark.parametrize(
+    "database, expected",
+    [
+        ("file:/tmp/db.sqlite3?mode=ro", True),
+        ("file:///tmp/my%20db%3F.sqlite3?mode=ro", True),
+        ("file:memorydb_default?mode=memory&cache=shared", False),
+        ("/tmp/db.sqlite3", False),
+    ],
+)
+def test_is_read_only_uri(database: str, expected: bool):
+    assert is_read_only_uri(database) is expected
+
+
+def test_read_only_replica_router():
+    router = ReadOnlyReplicaRouter()
+    assert router.db_for_read(Actor) == READ_DB_ALIAS
+    assert router.db_for_write(Actor) == WRITE_DB_ALIAS
+    assert router.allow_migrate(WRITE_DB_ALIAS, "searcher")
+    assert not router.allow_migrate(READ_DB_ALIAS, "searcher")
+
+
+@pytest.mark.django_db(transaction=True, databases=[WRITE_DB_ALIAS, READ_DB_ALIAS])
+def test_read_write_split(settings):
+    # Other tests run without the router, since the readonly connection doesn't see
+    # their test transaction, here everything is committed.
+    settings.DATABASE_ROUTERS = ["core.db.routers.ReadOnlyReplicaRouter"]
+    actors = (services.ActorDTO("Tom Hulce", "1"), services.ActorDTO("F. Murray Abraham", "2"))
+
+    with capture_queries() as queries:
+        services.create_movie_with_actors(services.MovieDTO("Amadeus", actors))
+        # Actors of the previous movie are found by the write connection, not created again.
+        services.create_movie_with_actors(services.MovieDTO("Ragtime", actors[:1]))
+    assert queries[WRITE_DB_ALIAS] and not queries[READ_DB_ALIAS]
+
+    with capture_queries() as queries:
+        movies, actors_found = services.get_movies_and_actors_by_query("hulce")
+        assert [movie.name for movie in movies] == ["Amadeus", "Ragtime"]
+        assert [actor.name for actor in actors_found] == ["Tom Hulce"]
+        amadeus = services.get_movie_by_slug(movies[0].slug)
+        assert sorted(actor.name for actor in amadeus.actors.all()) == [
+            "F. Murray Abraham",
+            "Tom Hulce",
+        ]
+    assert queries[READ_DB_ALIAS] and not queries[WRITE_DB_ALIAS]
+
+    with capture_queries() as queries:
+        services.clean_db()
+    assert queries[WRITE_DB_ALIAS] and not queries[READ_DB_ALIAS]
+    assert services.is_db_empty()
+
+
+@contextmanager
+def capture_queries() -> Iterator[dict[str, CaptureQueriesContext]]:
+    with CaptureQueriesContext(connections[WRITE_DB_ALIAS]) as write_queries:
+        with CaptureQueriesContext(connections[READ_DB_ALIAS]) as read_queries:
+            yield {WRITE_DB_ALIAS: write_queries, READ_DB_ALIAS: read_queries}
@@ -0,0 +1,74 @@
+import logging
+from http import HTTPStatus
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from searcher import instrumentation
+
+
+@pytest.fixture(autouse=True)
+def clean_histograms():
+    instrumentation.histograms.reset()
+    yield
+    instrumentation.histograms.reset()
+
+
+def test_latency_histogram():
+    histogram = instrumentation.LatencyHistogram()
+    assert histogram.percentile(0.5) is None
+
+    for duration in (0.5, 3, 3, 4, 150, 10000):
+        histogram.record(duration)
+    assert histogram.count == 6
+    assert histogram.percentile(0.5) == 5
+    assert histogram.percentile(0.8) == 200
+    # The slowest one didn't fit into any bounded bucket, the last bound is its lower estimate.
+    assert histogram.percentile(1) == instrumentation.BUCKET_BOUNDS_MS[-1]
+    assert histogram.as_dict()["buckets"]["le_inf"] == 1
+
+
+@pytest.mark.django_db
+def test_server_timing_header(client: Client):
+    response = client.get(reverse("search") + "?q=some")
+    assert response.status_code == HTTPStatus.OK
+    server_timing = response["Server-Timing"]
+    assert 'db;desc="1 queries"' in server_timing
+    assert "tpl;dur=" in server_timing and "total;dur=" in server_timing
+
+    dump = instrumentation.histograms.dump()
+    assert set(dump["SearchView"]) == {"total", "db", "template"}
+    assert dump["SearchView"]["total"]["count"] == 1
+
+
+@pytest.mark.django_db
+def test_slow_request_is_logged(client: Client, settings, caplog):
+    settings.PERFORMANCE_SLOW_REQUEST_MS = 0
+    settings.PERFORMANCE_SLOW_REQUEST_SAMPLE_RATE = 1
+    with caplog.at_level(logging.WARNING, logger="searcher.performance"):
+        client.get(reverse("search"))
+    assert "Slow request GET / (SearchView)" in caplog.text
+
+
+@pytest.mark.django_db
+def test_metrics_view(client: Client, settings):
+    settings.METRICS_TOKEN = "secret"
+    client.get(reverse("search"))
+    response = client.get(reverse("metrics"), HTTP_X_METRICS_TOKEN="secret")
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["SearchView"]["total"]["count"] == 1
+
+    response = client.get(reverse("metrics"), HTTP_X_METRICS_TOKEN="wrong")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    response = client.get(reverse("metrics"), REMOTE_ADDR="10.0.0.1", HTTP_X_METRICS_TOKEN="secret")
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_metrics_view_without_token(client: Client, settings):
+    # Every client of a local reverse proxy comes from 127.0.0.1.
+    settings.METRICS_TOKEN = ""
+    assert client.get(reverse("metrics")).status_code == HTTPStatus.NOT_FOUND
+    settings.DEBUG = True
+    assert client.get(reverse("metrics")).status_code == HTTPStatus.OK
@@ -1,5 +1,71 @@
-from searcher.management.commands.parse_csfd import parse_actor_id_from_href
+import pytest
+import requests
+from django.core.management import CommandError
+
+from searcher.management.commands.parse_csfd import (
+    iter_movie_urls,
+    parse_actor_id_from_href,
+)
 
 
 def test_parse_actor_id_from_href():
     assert parse_actor_id_from_href("/actors/123456-some-actor/") == "123456"
+
+
+class StreamedResponse:
+    """
+    Mimics a streamed requests response, records, how much of the body was read.
+    """
+
+    def __init__(self, chunks: list[bytes]):
+        self.chunks = chunks
+        self.encoding = "utf-8"
+        self.read_chunks = 0
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size: int):
+        for chunk in self.chunks:
+            self.read_chunks += 1
+            yield chunk
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+def movie_link(number: int) -> bytes:
+    link = f'<a class="film-title-name" href="/film/{number}-film/">Film {number}</a>'
+    return f"<li>{link}</li>".encode()
+
+
+@pytest.fixture
+def list_response(monkeypatch) -> StreamedResponse:
+    html = b"<html><body><ul>" + b"".join(movie_link(number) for number in range(100))
+    html += movie_link(0) + b'<a class="other" href="/other/">Other</a></ul></body></html>'
+    # Uneven chunks, so links are split between them.
+    chunk_size = 333
+    chunks = [html[start:][:chunk_size] for start in range(0, len(html), chunk_size)]
+    response = StreamedResponse(chunks)
+    monkeypatch.setattr(requests, "get", lambda *args, **kwargs: response)
+    return response
+
+
+def test_iter_movie_urls(list_response: StreamedResponse):
+    urls = iter_movie_urls("https://example.com/list/")
+    assert next(urls) == "/film/0-film/"
+    # First movie can be fetched before the list was downloaded.
+    assert list_response.read_chunks < len(list_response.chunks)
+    # Duplicates and other links are skipped.
+    assert [next(urls) for _ in range(99)] == [f"/film/{number}-film/" for number in range(1, 100)]
+    assert list(urls) == []
+
+
+def test_iter_movie_urls_without_href(monkeypatch):
+    response = StreamedResponse([b'<a class="film-title-name">Film</a>'])
+    monkeypatch.setattr(requests, "get", lambda *args, **kwargs: response)
+    with pytest.raises(CommandError):
+        list(iter_movie_urls("https://example.com/list/"))
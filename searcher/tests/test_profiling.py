@@ -0,0 +1,91 @@
+import pstats
+import threading
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import Client
+from django.urls import reverse
+
+from searcher.profiling import PROFILE_PATH_HEADER, ProfilingMiddleware, StageProfiler
+
+
+@pytest.fixture
+def profiling_dir(settings, tmp_path: Path) -> Path:
+    settings.PROFILING_ENABLED = True
+    settings.PROFILING_DIR = tmp_path
+    settings.PROFILING_TOKEN = "secret"
+    return tmp_path
+
+
+@pytest.fixture
+def client(profiling_dir: Path) -> Client:
+    # Middleware of the session client was loaded with profiling settings of the environment.
+    return Client()
+
+
+@pytest.mark.django_db
+def test_request_profile(client: Client, profiling_dir: Path):
+    response = client.get(reverse("search") + "?q=some&__profile=secret")
+    assert response.status_code == HTTPStatus.OK
+    profile_path = Path(response[PROFILE_PATH_HEADER])
+    assert profile_path.parent == profiling_dir
+    assert pstats.Stats(str(profile_path)).total_calls > 0
+
+    response = client.get(reverse("search"), HTTP_X_PROFILE="secret")
+    assert PROFILE_PATH_HEADER in response
+    assert len(list(profiling_dir.iterdir())) == 2
+
+
+@pytest.mark.django_db
+def test_request_profile_not_allowed(client: Client, profiling_dir: Path):
+    response = client.get(reverse("search") + "?__profile=secret", REMOTE_ADDR="10.0.0.1")
+    assert PROFILE_PATH_HEADER not in response
+    # Every client of a local reverse proxy comes from 127.0.0.1.
+    response = client.get(reverse("search") + "?__profile=wrong")
+    assert PROFILE_PATH_HEADER not in response
+    assert not list(profiling_dir.iterdir())
+
+
+def test_profiling_middleware_disabled(settings):
+    settings.PROFILING_ENABLED = False
+    with pytest.raises(MiddlewareNotUsed):
+        ProfilingMiddleware(lambda request: HttpResponse())
+
+
+def test_profiling_middleware_requires_token(settings):
+    settings.PROFILING_ENABLED = True
+    settings.PROFILING_TOKEN = ""
+    with pytest.raises(ImproperlyConfigured):
+        ProfilingMiddleware(lambda request: HttpResponse())
+
+
+def test_stage_profiler(tmp_path: Path):
+    profiler = StageProfiler()
+    with profiler.stage("fetch"):
+        sum(range(10))
+    assert profiler.dump(tmp_path) == []
+
+    profiler.enable()
+
+    def fetch():
+        with profiler.stage("fetch"):
+            sorted(range(100))
+
+    threads = [threading.Thread(target=fetch) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with profiler.stage("parse"):
+        sorted(range(100))
+        # Would fail with "another profiling tool is already active" since python 3.12.
+        with profiler.stage("db_write"):
+            sorted(range(100))
+
+    paths = profiler.dump(tmp_path)
+    assert sorted(path.name for path in paths) == ["fetch.prof", "parse.prof"]
+    fetch_stats = pstats.Stats(str(tmp_path / "fetch.prof"))
+    assert any(calls == 3 for _, calls, *_ in fetch_stats.stats.values())
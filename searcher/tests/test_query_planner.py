@@ -0,0 +1,28 @@
+import pytest
+
+from searcher.query_planner import MAX_TERMS, SearchPlan, plan_query
+
+
+@pytest.mark.parametrize(
+    "query, plan",
+    [
+        (None, SearchPlan(terms=())),
+        ("  ?! ", SearchPlan(terms=())),
+        ("Forman  AMADEUS", SearchPlan(terms=("amadeus", "forman"))),
+        ("Miloš Forman, Amadeus", SearchPlan(terms=("amadeus", "forman", "miloš"))),
+        ("tom tomáš tom", SearchPlan(terms=("tomáš",))),
+        ("movies with Hanks", SearchPlan(terms=("hanks",), actors=False, related_only=True)),
+        ("filmy s Hanksem", SearchPlan(terms=("hanksem",), actors=False, related_only=True)),
+        ("actors in Amadeus", SearchPlan(terms=("amadeus",), movies=False, related_only=True)),
+        ("movies with", SearchPlan(terms=("movies", "with"))),
+        ("without", SearchPlan(terms=("without",))),
+    ],
+)
+def test_plan_query(query, plan: SearchPlan):
+    assert plan_query(query) == plan
+
+
+def test_plan_query_bounds_terms():
+    plan = plan_query(" ".join(f"term{number}" for number in range(MAX_TERMS * 2)))
+    assert len(plan.terms) == MAX_TERMS
+    assert not plan_query("")
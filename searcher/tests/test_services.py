@@ -1,13 +1,20 @@
-from typing import Callable, Type, Union
+from typing import Callable, Optional, Type, Union
 
+import factory
 import faker
 import pytest
+from django.db import connection
 from django.http import Http404
+from django.test.utils import CaptureQueriesContext
 
 from searcher import models, services
 
 from .factories import ActorFactory, MovieFactory
 
+# Random sentences might contain every term of a searched query, names of entities,
+# which must not be found, are generated without them.
+other_names = factory.Sequence(lambda number: f"Other {number}")
+
 fake = faker.Faker()
 
 
@@ -96,14 +103,14 @@ def test_get_movies_and_actors_by_query_both_exist(
 ):
     specific_name = "Very Specific and Unique Name"
     specific_actor = actor_factory(name=specific_name)
-    actor_factory.create_batch(10)
+    actor_factory.create_batch(10, name=other_names)
     specific_movie = movie_factory(name=specific_name)
-    movie_factory.create_batch(10)
+    movie_factory.create_batch(10, name=other_names)
 
     movies, actors = services.get_movies_and_actors_by_query("y specific a")
-    assert movies.count() == 1
+    assert len(movies) == 1
     assert specific_movie in movies
-    assert actors.count() == 1
+    assert len(actors) == 1
     assert specific_actor in actors
 
 
@@ -114,12 +121,12 @@ def test_get_movies_and_actors_by_query_actor_exist(
 ):
     specific_name = "Very Specific and Unique Name"
     actor_factory(name=specific_name)
-    actor_factory.create_batch(10)
-    movie_factory.create_batch(10)
+    actor_factory.create_batch(10, name=other_names)
+    movie_factory.create_batch(10, name=other_names)
 
     movies, actors = services.get_movies_and_actors_by_query("y specific a")
-    assert not movies.exists()
-    assert actors.exists()
+    assert not movies
+    assert actors
 
 
 @pytest.mark.django_db
@@ -128,13 +135,13 @@ def test_get_movies_and_actors_by_query_movie_exist(
     movie_factory: Type[MovieFactory],
 ):
     specific_name = "Very Specific and Unique Name"
-    actor_factory.create_batch(10)
+    actor_factory.create_batch(10, name=other_names)
     movie_factory(name=specific_name)
-    movie_factory.create_batch(10)
+    movie_factory.create_batch(10, name=other_names)
 
     movies, actors = services.get_movies_and_actors_by_query("y specific a")
-    assert movies.exists()
-    assert not actors.exists()
+    assert movies
+    assert not actors
 
 
 @pytest.mark.django_db
@@ -142,12 +149,12 @@ def test_get_movies_and_actors_by_query_movie_not_exist(
     actor_factory: Type[ActorFactory],
     movie_factory: Type[MovieFactory],
 ):
-    actor_factory.create_batch(10)
-    movie_factory.create_batch(10)
+    actor_factory.create_batch(10, name=other_names)
+    movie_factory.create_batch(10, name=other_names)
 
     movies, actors = services.get_movies_and_actors_by_query("y specific a")
-    assert not movies.exists()
-    assert not actors.exists()
+    assert not movies
+    assert not actors
 
 
 @pytest.mark.django_db
@@ -168,3 +175,72 @@ def test_get_model_by_slug(
 
     with pytest.raises(Http404):
         get_by_slug_method("random-not-existing-slug")
+
+
+@pytest.mark.django_db
+def test_create_movie_with_actors_identity_map(actor_factory: Type[ActorFactory]):
+    existing_actors = actor_factory.create_batch(3)
+    identity_map = services.ActorIdentityMap.from_db()
+    assert len(identity_map) == 3
+
+    actors = tuple(services.ActorDTO(actor.name, str(actor.csfd_id)) for actor in existing_actors)
+    new_actor = services.ActorDTO(fake.name(), "100500")
+    services.create_movie_with_actors(services.MovieDTO(fake.name(), actors), identity_map)
+    services.create_movie_with_actors(
+        services.MovieDTO(fake.name(), actors + (new_actor,)), identity_map
+    )
+    assert len(identity_map) == 4
+
+    # All actors are already known, so they are not even queried
+    with CaptureQueriesContext(connection) as context:
+        services.create_movie_with_actors(
+            services.MovieDTO(fake.name(), actors + (new_actor,)), identity_map
+        )
+    assert not any('FROM "searcher_actor"' in query["sql"] for query in context.captured_queries)
+
+    assert models.Actor.objects.count() == 4
+    assert models.Actor.objects.get(csfd_id=100500).movies.count() == 2
+    assert sorted(movie.actors.count() for movie in models.Movie.objects.all()) == [3, 4, 4]
+
+
+@pytest.mark.django_db
+def test_get_movies_and_actors_by_query_terms_across_entities(
+    actor_factory: Type[ActorFactory],
+    movie_factory: Type[MovieFactory],
+):
+    forman = actor_factory(name="Miloš Forman")
+    hulce = actor_factory(name="Tom Hulce")
+    amadeus = movie_factory(name="Amadeus")
+    amadeus.actors.add(forman, hulce)
+    movie_factory(name="Amadeus Mozart").actors.add(hulce)
+
+    movies, actors = services.get_movies_and_actors_by_query("forman amadeus")
+    assert movies == [amadeus]
+    assert actors == [forman]
+
+    movies, actors = services.get_movies_and_actors_by_query("movies with Forman")
+    assert movies == [amadeus]
+    assert actors == []
+
+    movies, actors = services.get_movies_and_actors_by_query("actors in mozart")
+    assert movies == []
+    assert actors == [hulce]
+
+
+@pytest.mark.django_db
+def test_get_movies_and_actors_by_query_limit(movie_factory: Type[MovieFactory]):
+    movies = movie_factory.create_batch(5, name="Same Name")
+    found, _ = services.get_movies_and_actors_by_query("same", limit=3)
+    assert [movie.slug for movie in found] == sorted(movie.slug for movie in movies)[:3]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "query, expected_queries",
+    [(None, 0), ("", 0), ("!?", 0), ("tom", 1), ("tom hanks gump", 1), ("movies with tom", 1)],
+)
+def test_get_movies_and_actors_by_query_num_queries(
+    django_assert_num_queries, query: Optional[str], expected_queries: int
+):
+    with django_assert_num_queries(expected_queries):
+        services.get_movies_and_actors_by_query(query)
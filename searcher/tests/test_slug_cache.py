@@ -0,0 +1,135 @@
+from http import HTTPStatus
+from typing import Type
+
+import pytest
+from django.http import Http404
+from django.test import Client
+from django.urls import reverse
+
+from searcher import models, services, slug_cache, warmup
+
+from .factories import ActorFactory, MovieFactory
+
+
+@pytest.mark.parametrize("capacity", [1, 10, 10_000, 100_000])
+def test_bloom_filter(capacity: int):
+    slugs = [f"{number}-slug" for number in range(capacity)]
+    bloom_filter = slug_cache.BloomFilter.from_items(slugs, len(slugs), 0.01)
+    assert all(slug in bloom_filter for slug in slugs)
+    false_positives = sum(f"{number}-other" in bloom_filter for number in range(10_000))
+    assert false_positives < 100
+    assert "anything" not in slug_cache.BloomFilter(0, 0.01)
+
+
+def test_lru_cache():
+    cache = slug_cache.LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c"), len(cache)) == (1, 3, 2)
+
+
+@pytest.mark.django_db
+def test_get_entity_by_slug_cached(
+    django_assert_num_queries, actor_factory: Type[ActorFactory], movie_factory: Type[MovieFactory]
+):
+    actor = actor_factory(name="Tom Hanks")
+    movie = movie_factory(name="Forrest Gump")
+    movie.actors.add(actor)
+
+    # Slug filter is built (count and slugs) and the actor is loaded with their movies.
+    with django_assert_num_queries(4):
+        assert services.get_entity_by_slug(models.Actor, actor.slug) == actor
+    with django_assert_num_queries(0):
+        cached = services.get_entity_by_slug(models.Actor, actor.slug)
+        assert list(cached.movies.all()) == [movie]
+    with django_assert_num_queries(0), pytest.raises(Http404):
+        services.get_entity_by_slug(models.Actor, f"{actor.slug}-not-existing")
+    assert slug_cache.stats()["Actor"] == {
+        "hits": 1,
+        "misses": 1,
+        "rejected": 1,
+        "false_positives": 0,
+        "cached": 1,
+    }
+
+
+@pytest.mark.django_db
+def test_get_entity_by_slug_after_change(
+    django_assert_num_queries, actor_factory: Type[ActorFactory], movie_factory: Type[MovieFactory]
+):
+    movie = movie_factory(name="Forrest Gump")
+    assert services.get_entity_by_slug(models.Movie, movie.slug).name == movie.name
+
+    # Changes are seen at once, cache and filter are rebuilt.
+    movie.name = "Renamed"
+    movie.save()
+    actor = actor_factory(name="Tom Hanks")
+    movie.actors.add(actor)
+    with django_assert_num_queries(4):
+        cached = services.get_entity_by_slug(models.Movie, movie.slug)
+        assert cached.name == "Renamed" and list(cached.actors.all()) == [actor]
+    assert services.get_entity_by_slug(models.Actor, actor.slug) == actor
+
+    # Dataset rewritten by a command.
+    actor.delete()
+    warmup.dataset_changed.send(sender=None)
+    with django_assert_num_queries(2), pytest.raises(Http404):
+        services.get_entity_by_slug(models.Actor, actor.slug)
+
+
+@pytest.mark.django_db
+def test_get_entity_by_slug_after_delete(settings, movie_factory: Type[MovieFactory]):
+    movie = movie_factory(name="Forrest Gump")
+    assert services.get_entity_by_slug(models.Movie, movie.slug) == movie
+    slug = movie.slug
+    movie.delete()
+    with pytest.raises(Http404):
+        services.get_entity_by_slug(models.Movie, slug)
+    # Other processes are notified by commands, not by every single write.
+    assert not settings.DATASET_VERSION_PATH.exists()
+
+
+@pytest.mark.django_db
+def test_cached_entities_not_shared(movie_factory: Type[MovieFactory]):
+    movie = movie_factory(name="Forrest Gump")
+    first = services.get_entity_by_slug(models.Movie, movie.slug)
+    first.name = "Changed by a request"
+    second = services.get_entity_by_slug(models.Movie, movie.slug)
+    assert second is not first and second.name == "Forrest Gump"
+
+
+@pytest.mark.django_db
+def test_rebuild_once_per_version(django_assert_num_queries):
+    resolver = slug_cache.resolvers[models.Actor]
+    version = warmup.dataset_version()
+    resolver.rebuild(version)
+    # Threads, which waited for the first one, do not build the filter again.
+    with django_assert_num_queries(0):
+        resolver.rebuild(version)
+
+
+@pytest.mark.django_db
+def test_false_positive(django_assert_num_queries, movie_factory: Type[MovieFactory]):
+    movie_factory(name="Forrest Gump")
+    resolver = slug_cache.resolvers[models.Movie]
+    resolver.rebuild()
+    # Filter with all bits set accepts anything.
+    resolver._filter.bits[:] = b"\xff" * len(resolver._filter.bits)
+    with django_assert_num_queries(1), pytest.raises(Http404):
+        services.get_entity_by_slug(models.Movie, "not-existing")
+    assert resolver.false_positives == 1
+
+
+@pytest.mark.django_db
+def test_metrics_view_slug_resolution(client: Client, settings, actor_factory: Type[ActorFactory]):
+    settings.METRICS_TOKEN = "secret"
+    actor = actor_factory(name="Tom Hanks")
+    for slug in (actor.slug, actor.slug, "not-existing"):
+        client.get(reverse("actor-detail", args=(slug,)))
+    response = client.get(reverse("metrics"), HTTP_X_METRICS_TOKEN="secret")
+    assert response.status_code == HTTPStatus.OK
+    stats = response.json()["slug_resolution"]["Actor"]
+    assert (stats["hits"], stats["misses"], stats["rejected"]) == (1, 1, 1)
@@ -0,0 +1,190 @@
+from http import HTTPStatus
+from pathlib import Path
+from typing import Type
+
+import pytest
+from django.test import Client
+from django.urls import reverse
+
+from searcher import services, snapshot
+
+from .factories import ActorFactory, MovieFactory
+
+
+@pytest.fixture
+def dataset(
+    actor_factory: Type[ActorFactory],
+    movie_factory: Type[MovieFactory],
+) -> tuple[list, list]:
+    actors = [
+        actor_factory(name=name)
+        for name in ("Tom Hanks", "Tomáš Hanák", "Meg Ryan", "Ivana Chýlková", "Ryan Gosling")
+    ]
+    movies = [movie_factory(name=name) for name in ("Forrest Gump", "Tom a Meg", "Pelíšky")]
+    movies[0].actors.add(actors[0])
+    movies[1].actors.add(actors[0], actors[2])
+    movies[2].actors.add(actors[1], actors[3])
+    return movies, actors
+
+
+@pytest.fixture
+def snapshot_path(settings, tmp_path: Path) -> Path:
+    path = tmp_path / "snapshot.bin"
+    settings.SNAPSHOT_PATH = path
+    settings.SNAPSHOT_ENABLED = True
+    settings.SNAPSHOT_CHECK_INTERVAL = 0
+    snapshot.reset()
+    yield path
+    snapshot.reset()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "query",
+    ["tom", "RYAN", "a", "gump", "hanks tom", "meg gump", "movies with tom", "actors in gump"]
+    + ["nothing"],
+)
+def test_snapshot_search_matches_orm(dataset, snapshot_path: Path, query: str):
+    snapshot.build_snapshot(snapshot_path)
+    movies, actors = snapshot.Snapshot(snapshot_path).search(query)
+    orm_movies, orm_actors = services.get_movies_and_actors_by_query(query)
+    assert [record.slug for record in movies] == [movie.slug for movie in orm_movies]
+    assert [record.slug for record in actors] == [actor.slug for actor in orm_actors]
+
+
+@pytest.mark.django_db
+def test_snapshot_unicode_search(dataset, snapshot_path: Path):
+    snapshot.build_snapshot(snapshot_path)
+    movies, actors = snapshot.Snapshot(snapshot_path).search("CHÝL")
+    # Found through its actor.
+    assert [record.name for record in movies] == ["Pelíšky"]
+    assert [record.name for record in actors] == ["Ivana Chýlková"]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "query, movie_names, actor_names",
+    [
+        ("Šťastný", ["Krásný život"], ["Pavel Šťastný"]),
+        ("ŠŤASTNÝ", ["Krásný život"], ["Pavel Šťastný"]),
+        ("šťastný", ["Krásný život"], ["Pavel Šťastný"]),
+        # The actor is found through their movie.
+        ("Život", ["Krásný život", "Život je život"], ["Pavel Šťastný"]),
+        ("život", ["Krásný život", "Život je život"], ["Pavel Šťastný"]),
+    ],
+)
+def test_non_ascii_case_matches_orm(
+    actor_factory: Type[ActorFactory],
+    movie_factory: Type[MovieFactory],
+    snapshot_path: Path,
+    query: str,
+    movie_names: list[str],
+    actor_names: list[str],
+):
+    # Sqlite LIKE alone would only match "Š" in names to "Š" in the query.
+    actor = actor_factory(name="Pavel Šťastný")
+    movie_factory(name="Život je život")
+    movie_factory(name="Krásný život").actors.add(actor)
+    movie_factory(name="Zivot")
+    snapshot.build_snapshot(snapshot_path)
+    movies, actors = snapshot.Snapshot(snapshot_path).search(query)
+    orm_movies, orm_actors = services.get_movies_and_actors_by_query(query)
+    assert sorted(movie.name for movie in orm_movies) == movie_names
+    assert [actor.name for actor in orm_actors] == actor_names
+    assert [record.slug for record in movies] == [movie.slug for movie in orm_movies]
+    assert [record.slug for record in actors] == [actor.slug for actor in orm_actors]
+
+
+@pytest.mark.django_db
+def test_snapshot_get_by_slug(dataset, snapshot_path: Path):
+    movies, actors = dataset
+    snapshot.build_snapshot(snapshot_path)
+    dataset_snapshot = snapshot.Snapshot(snapshot_path)
+
+    for movie in movies:
+        record = dataset_snapshot.get_by_slug(dataset_snapshot.movies, movie.slug)
+        assert record.name == movie.name
+        assert [actor.slug for actor in record.actors.all()] == [
+            actor.slug for actor in movie.actors.all()
+        ]
+    for actor in actors:
+        record = dataset_snapshot.get_by_slug(dataset_snapshot.actors, actor.slug)
+        assert record.name == actor.name
+        assert [movie.slug for movie in record.movies.all()] == [
+            movie.slug for movie in actor.movies.all()
+        ]
+    assert dataset_snapshot.get_by_slug(dataset_snapshot.actors, "not-existing") is None
+    assert dataset_snapshot.get_by_slug(dataset_snapshot.actors, "čeština") is None
+
+
+@pytest.mark.django_db
+def test_views_served_from_snapshot(client: Client, dataset, snapshot_path: Path):
+    movies, actors = dataset
+    snapshot.build_snapshot(snapshot_path)
+
+    response = client.get(reverse("search") + "?q=tom")
+    assert response.status_code == HTTPStatus.OK
+    assert isinstance(response.context["movies"], snapshot.RecordList)
+    assert sorted(actor.name for actor in response.context["actors"]) == [
+        "Meg Ryan",
+        "Tom Hanks",
+        "Tomáš Hanák",
+    ]
+    assert reverse("actor-detail", args=[actors[0].slug]) in response.content.decode()
+
+    response = client.get(reverse("movie-detail", args=[movies[1].slug]))
+    assert response.status_code == HTTPStatus.OK
+    assert response.context["movie"].name == "Tom a Meg"
+    assert "Meg Ryan" in response.content.decode()
+
+    response = client.get(reverse("actor-detail", args=[actors[0].slug]))
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.context["actor"].movies.all()) == 2
+
+    response = client.get(reverse("actor-detail", args=["some-random-slug"]))
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_snapshot_reloaded_after_rebuild(
+    dataset, snapshot_path: Path, actor_factory: Type[ActorFactory]
+):
+    assert snapshot.get_snapshot() is None
+
+    snapshot.build_snapshot(snapshot_path)
+    first = snapshot.get_snapshot()
+    assert first is not None and len(first.actors) == 5
+    assert snapshot.get_snapshot() is first
+
+    actor_factory()
+    snapshot.build_snapshot(snapshot_path)
+    second = snapshot.get_snapshot()
+    assert second is not first and len(second.actors) == 6
+    assert second.version > first.version
+
+
+def test_not_a_snapshot(tmp_path: Path):
+    path = tmp_path / "snapshot.bin"
+    path.write_bytes(b"x" * snapshot.HEADER.size)
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.Snapshot(path)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("damage", ["garbage", "empty", "truncated"])
+def test_broken_snapshot_falls_back_to_orm(
+    client: Client, dataset, snapshot_path: Path, damage: str
+):
+    snapshot.build_snapshot(snapshot_path)
+    content = snapshot_path.read_bytes()
+    snapshot_path.write_bytes(
+        {"garbage": b"garbage", "empty": b"", "truncated": content[: len(content) // 2]}[damage]
+    )
+    assert snapshot.get_snapshot() is None
+    response = client.get(reverse("search") + "?q=tom")
+    assert response.status_code == HTTPStatus.OK
+    assert [movie.name for movie in response.context["movies"]] == [
+        "Forrest Gump",
+        "Tom a Meg",
+        "Pelíšky",
+    ]
@@ -0,0 +1,26 @@
+from pathlib import Path
+
+import pytest
+
+from searcher.benchmarks import run_probe
+
+# Every probe starts a fresh interpreter and reads its RSS from /proc.
+pytestmark = [
+    pytest.mark.slow,
+    pytest.mark.skipif(not Path("/proc/self/status").exists(), reason="Needs /proc"),
+]
+
+
+def test_production_web_worker_has_no_debug_machinery():
+    result = run_probe("web", "production")
+    assert result["status"] == "200 OK"
+    assert result["heavy_modules"] == []
+
+    result = run_probe("web", "development")
+    assert result["status"] == "200 OK"
+    assert result["heavy_modules"] == ["debug_toolbar"]
+
+
+def test_parse_csfd_defers_heavy_imports():
+    result = run_probe("parse_csfd", "production")
+    assert result["heavy_modules"] == []
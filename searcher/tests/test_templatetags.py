@@ -0,0 +1,33 @@
+import re
+
+import pytest
+from django.template.loader import get_template
+from django.test import RequestFactory
+from django.urls import set_script_prefix
+
+from searcher.benchmarks import TEMPLATE_NAMES, get_reference_template, make_context
+
+
+def normalize(html: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r">\s+<", "><", html)).strip()
+
+
+@pytest.fixture
+def script_prefix():
+    set_script_prefix("/app/")
+    yield
+    set_script_prefix("/")
+
+
+@pytest.mark.parametrize("template_name", TEMPLATE_NAMES)
+@pytest.mark.parametrize("rows", [0, 1, 20])
+def test_detail_links_same_html(script_prefix, template_name: str, rows: int):
+    request = RequestFactory().get("/")
+    context = make_context(template_name, rows)
+    # Forms render the same, but csrf tokens are unique.
+    csrf_token = {"csrf_token": "token"}
+    expected = get_reference_template(template_name).render({**context, **csrf_token}, request)
+    rendered = get_template(template_name).render({**context, **csrf_token}, request)
+    if rows:
+        assert "/app/" in rendered and "&lt;" in rendered
+    assert normalize(rendered) == normalize(expected)
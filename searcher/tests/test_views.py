@@ -13,8 +13,8 @@ def test_search_view_without_query(client: Client):
     response = client.get(reverse("search"))
     assert response.status_code == HTTPStatus.OK
     assert response.context["query"] is None
-    assert not response.context["movies"].exists()
-    assert not response.context["actors"].exists()
+    assert not response.context["movies"]
+    assert not response.context["actors"]
 
 
 @pytest.mark.django_db
@@ -49,30 +49,45 @@ def test_search_view_with_query(
     response = client.get(reverse("search") + "?q=actor")
     assert response.status_code == HTTPStatus.OK
     response_actors = response.context["actors"]
-    assert response.context["movies"].count() == 0
-    assert response_actors.count() == 2
+    assert len(response.context["movies"]) == 0
+    assert len(response_actors) == 2
     assert second_actor in response_actors and first_actor in response_actors
 
     # Check by second word
     response = client.get(reverse("search") + "?q=movie")
     assert response.status_code == HTTPStatus.OK
     response_movies = response.context["movies"]
-    assert response.context["actors"].count() == 0
-    assert response_movies.count() == 2
+    assert len(response.context["actors"]) == 0
+    assert len(response_movies) == 2
     assert second_movie in response_movies and first_movie in response_movies
 
     # Check by fully matching word
     response = client.get(reverse("search") + "?q=first+actor")
     assert response.status_code == HTTPStatus.OK
     response_actors = response.context["actors"]
-    assert response_actors.count() == 1
+    assert len(response_actors) == 1
     assert first_actor in response_actors
 
     # Check by not matching word
     response = client.get(reverse("search") + "?q=not+matching")
     assert response.status_code == HTTPStatus.OK
-    assert response.context["actors"].count() == 0
-    assert response.context["movies"].count() == 0
+    assert len(response.context["actors"]) == 0
+    assert len(response.context["movies"]) == 0
+
+
+@pytest.mark.django_db
+def test_search_view_num_queries(
+    client: Client,
+    django_assert_num_queries,
+    actor_factory: Type[ActorFactory],
+    movie_factory: Type[MovieFactory],
+):
+    movie_factory(name="first movie").actors.add(*actor_factory.create_batch(3))
+    # Whole page, including the template, is rendered from a single statement.
+    with django_assert_num_queries(1):
+        response = client.get(reverse("search") + "?q=first+movie")
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.context["movies"]) == 1
 
 
 @pytest.mark.django_db
@@ -0,0 +1,48 @@
+import signal
+from pathlib import Path
+from typing import Type
+
+import pytest
+from django.http import Http404
+
+from searcher import models, services, warmup
+
+from .factories import ActorFactory, MovieFactory
+
+
+@pytest.fixture
+def warmed_up(actor_factory: Type[ActorFactory], movie_factory: Type[MovieFactory]):
+    actors = actor_factory.create_batch(5)
+    movies = movie_factory.create_batch(5)
+    warmup.warm_up(freeze=False)
+    return actors, movies
+
+
+@pytest.mark.django_db
+def test_get_entity_by_slug_after_warm_up(django_assert_num_queries, warmed_up):
+    actors, movies = warmed_up
+    # Slug filters were built by the warm-up, an instance and its related entities are loaded.
+    for instance in actors + movies:
+        with django_assert_num_queries(2):
+            assert services.get_entity_by_slug(type(instance), instance.slug) == instance
+    # Unknown slugs do not reach the DB.
+    with django_assert_num_queries(0), pytest.raises(Http404):
+        services.get_entity_by_slug(models.Actor, "not-existing")
+
+    warmup.dataset_changed.send(sender=None)
+    # Slug filter of actors is rebuilt.
+    with django_assert_num_queries(2), pytest.raises(Http404):
+        services.get_entity_by_slug(models.Actor, "not-existing")
+
+
+def test_notify_dataset_changed(settings, tmp_path: Path, monkeypatch):
+    settings.GUNICORN_PIDFILE = tmp_path / "gunicorn.pid"
+    signals = []
+    monkeypatch.setattr(warmup.os, "kill", lambda pid, sig: signals.append((pid, sig)))
+
+    warmup.notify_dataset_changed()
+    assert signals == []
+
+    settings.GUNICORN_PIDFILE.write_text("12345\n")
+    warmup.notify_dataset_changed()
+    assert signals == [(12345, signal.SIGHUP)]
@@ -1,9 +1,18 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import async_views, views
+
+if settings.ASYNC_VIEWS:
+    search_view, actor_view, movie_view = async_views.search, async_views.actor, async_views.movie
+else:
+    search_view = views.SearchView.as_view()
+    actor_view = views.ActorView.as_view()
+    movie_view = views.MovieView.as_view()
 
 urlpatterns = [
-    path("", views.SearchView.as_view(), name="search"),
-    path("actors/<slug:slug>/", views.ActorView.as_view(), name="actor-detail"),
-    path("movies/<slug:slug>/", views.MovieView.as_view(), name="movie-detail"),
+    path("", search_view, name="search"),
+    path("actors/<slug:slug>/", actor_view, name="actor-detail"),
+    path("movies/<slug:slug>/", movie_view, name="movie-detail"),
+    path("__metrics__/", views.MetricsView.as_view(), name="metrics"),
 ]
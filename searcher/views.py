@@ -1,10 +1,10 @@
 from urllib.parse import urlencode
 
-from django.http import HttpRequest, HttpResponse
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import redirect
-from django.views.generic import DetailView, FormView
+from django.views.generic import DetailView, FormView, View
 
-from . import forms, services
+from . import forms, instrumentation, services, slug_cache, snapshot
 from .models import Actor, Movie
 
 
@@ -19,7 +19,7 @@ class SearchView(FormView):
 
     def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
         query = self.request.GET.get("q")
-        movies, actors = services.get_movies_and_actors_by_query(query)
+        movies, actors = services.search_movies_and_actors(query)
 
         return self.render_to_response(
             {
@@ -35,7 +35,25 @@ class SearchView(FormView):
         return redirect("/?" + urlencode({"q": query}))
 
 
-class ActorView(DetailView):
+class SnapshotDetailView(DetailView):
+    """
+    Detail view, which looks the object up in the dataset snapshot, if one is available,
+    and falls back to services.get_entity_by_slug otherwise.
+    """
+
+    snapshot_table: str
+
+    def get_object(self, queryset=None):
+        dataset = snapshot.get_snapshot()
+        if dataset is None:
+            return services.get_entity_by_slug(self.model, self.kwargs["slug"])
+        record = dataset.get_by_slug(getattr(dataset, self.snapshot_table), self.kwargs["slug"])
+        if record is None:
+            raise Http404(f"No {self.model.__name__} matches the given slug.")
+        return record
+
+
+class ActorView(SnapshotDetailView):
     """
     Single actor info. Shows actor info + movies.
     Correct actor is requested by provided slug.
@@ -43,9 +61,11 @@ class ActorView(DetailView):
 
     template_name = "actor.html"
     model = Actor
+    context_object_name = "actor"
+    snapshot_table = "actors"
 
 
-class MovieView(DetailView):
+class MovieView(SnapshotDetailView):
     """
     Single movie info. Shows movie info + starring actors.
     Correct movie is requested by provided slug.
@@ -53,3 +73,19 @@ class MovieView(DetailView):
 
     template_name = "movie.html"
     model = Movie
+    context_object_name = "movie"
+    snapshot_table = "movies"
+
+
+class MetricsView(View):
+    """
+    Dumps latency histograms of the current worker process as json.
+    Available only from INTERNAL_IPS with METRICS_TOKEN, see instrumentation.is_metrics_allowed.
+    """
+
+    def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if not instrumentation.is_metrics_allowed(request):
+            raise Http404
+        return JsonResponse(
+            {**instrumentation.histograms.dump(), "slug_resolution": slug_cache.stats()}
+        )
@@ -0,0 +1,125 @@
+"""
+Warm-up of read structures before web workers are forked (see core/gunicorn.py).
+
+Anything loaded by the master process is inherited by forked workers and stays shared with them,
+as long as nobody writes to its memory pages. Python objects are written to by reference counting
+and the garbage collector, so the dataset itself is only loaded as the mmapped snapshot
+and everything loaded is frozen out of the garbage collector.
+"""
+
+import gc
+import logging
+import os
+import signal
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.db import connections
+from django.dispatch import Signal, receiver
+from django.template.loader import get_template
+
+from . import snapshot
+from .templatetags.detail_links import detail_links
+
+logger = logging.getLogger("searcher.warmup")
+
+# Templates rendered by SearchView, ActorView and MovieView.
+TEMPLATE_NAMES = ("search.html", "actor.html", "movie.html")
+DETAIL_URL_NAMES = ("actor-detail", "movie-detail")
+
+# Sent, when the dataset was rewritten (by parse_csfd), in-process caches are dropped on it.
+dataset_changed = Signal()
+# Sent by warm_up before memory is frozen, receivers load their own shared structures on it.
+warming_up = Signal()
+
+# Bumped by dataset_changed in this process.
+_generation = 0
+_version_lock = threading.Lock()
+_marker_mtime: Optional[int] = None
+_checked_at = float("-inf")
+
+
+def dataset_version() -> tuple[int, Optional[int]]:
+    """
+    Version of the dataset, which changes whenever it is rewritten: by dataset_changed
+    in this process or by notify_dataset_changed in another one, which touches
+    DATASET_VERSION_PATH. The file is checked at most once per DATASET_VERSION_CHECK_INTERVAL.
+    """
+    global _marker_mtime, _checked_at
+    now = time.monotonic()
+    if now - _checked_at >= settings.DATASET_VERSION_CHECK_INTERVAL:
+        with _version_lock:
+            try:
+                _marker_mtime = os.stat(settings.DATASET_VERSION_PATH).st_mtime_ns
+            except FileNotFoundError:
+                _marker_mtime = None
+            _checked_at = now
+    return _generation, _marker_mtime
+
+
+def warm_up(freeze: bool = True) -> None:
+    """
+    Loads everything, which requests need, so that forked workers share it and start warm:
+    the snapshot pages (its slugs and normalized names) and compiled templates
+    with URLs of detail pages.
+    @param freeze: move all objects to the permanent generation of the garbage collector,
+        so it never touches (and copies) their memory pages in forked workers.
+    """
+    start = time.perf_counter()
+    snapshot.reset()
+    dataset = snapshot.get_snapshot()
+    if dataset is not None:
+        dataset.preload()
+
+    for template_name in TEMPLATE_NAMES:
+        get_template(template_name)
+    for url_name in DETAIL_URL_NAMES:
+        detail_links([], url_name)
+    warming_up.send(sender=None)
+
+    # Forked workers must not share DB connections of the master.
+    connections.close_all()
+    if freeze:
+        gc.collect()
+        gc.freeze()
+    logger.info(
+        "Warmed up in %.2fs, snapshot %s",
+        time.perf_counter() - start,
+        "loaded" if dataset is not None else "is not available",
+    )
+
+
+@receiver(dataset_changed)
+def on_dataset_changed(**kwargs) -> None:
+    global _generation
+    with _version_lock:
+        _generation += 1
+
+
+def touch_dataset_version() -> None:
+    """
+    Lets other processes know, that the dataset changed, see dataset_version.
+    """
+    settings.DATASET_VERSION_PATH.write_text(str(time.time_ns()))
+
+
+def notify_dataset_changed() -> None:
+    """
+    Drops stale structures of the current process, lets other processes know about the change
+    by touching DATASET_VERSION_PATH and asks gunicorn master (if it runs)
+    to warm up again and replace its workers by SIGHUP.
+    """
+    touch_dataset_version()
+    dataset_changed.send(sender=None)
+    try:
+        pid = int(settings.GUNICORN_PIDFILE.read_text())
+    except (FileNotFoundError, ValueError):
+        return
+    try:
+        os.kill(pid, signal.SIGHUP)
+    except ProcessLookupError:
+        logger.warning("Gunicorn pidfile %s is stale", settings.GUNICORN_PIDFILE)
+        return
+    logger.info("Sent reload signal to gunicorn master %d", pid)